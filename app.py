@@ -1,53 +1,44 @@
 import dash
 from flask import Flask, jsonify, request
-from dash import Dash, dcc, html
-from dash.dependencies import Input, Output, State, ALL
+from dash import Dash, dcc, html, clientside_callback
+from dash.dependencies import Input, Output, State, MATCH, ALL, ClientsideFunction
 import dash_cytoscape as cyto
 import mongodb_utils
 import mysql_utils
 import neo4j_utils
-import requests
+import metrics
+import services
+import warmup
+import wordcloud_utils
 import plotly.graph_objs as go
+import logging
+import os
 import random
 
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import base64
-from io import BytesIO
-
-# Helper to generate wordcloud
-def generate_wordcloud(text):
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text)
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis('off')
-
-    # Save the word cloud image in memory
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png")
-    buffer.seek(0)
-    img_str = base64.b64encode(buffer.getvalue()).decode()
-    plt.close()
-    return f"data:image/png;base64,{img_str}"
-
-# Helper to generate wordcloud from frequencies
-def generate_wordcloud_from_frequencies(word_frequencies):
-    wordcloud = WordCloud(width=850, height=380, background_color='white').generate_from_frequencies(word_frequencies)
-    image = BytesIO()
-    wordcloud.to_image().save(image, format='PNG')
-    image.seek(0)
-    return 'data:image/png;base64,' + base64.b64encode(image.read()).decode('utf-8')
+logger = logging.getLogger(__name__)
 
 # Create a dash application
 server = Flask(__name__)
 app = Dash(__name__, server=server)
 app.scripts.config.serve_locally = True  # Ensure local assets are served
 
-# Ensure mongodb indexes are created
-mongodb_utils.create_indexes()
+# Record latency, in-flight calls, errors and rows of the database queries (DASHBOARD_METRICS=1)
+if metrics.enabled:
+    metrics.instrument_module(mysql_utils, 'mysql')
+    metrics.instrument_module(mongodb_utils, 'mongodb')
+    metrics.instrument_module(neo4j_utils, 'neo4j')
+
+# Create the mongodb, mysql and neo4j indexes and warm the caches in the
+# background, see /readyz for progress. It starts with the first request of
+# each process rather than at import, so a preloading server master that only
+# forks workers (see wsgi.py) never opens connections or starts threads
+@server.before_request
+def start_warmup():
+    warmup.start()
 
 # Add a title to the layout
 app.layout = html.Div([
+    dcc.Location(id='url'),
     html.H1('Academic Faculty and Research Insight Dashboard', style={'textAlign': 'center', 'color': '#2c3e50'}),
     html.Div([
         # Searchbar
@@ -66,24 +57,16 @@ app.layout = html.Div([
             html.Div([
                 html.Button('Faculty', id='faculty-button', style={'display': 'block', 'margin-bottom': '5px', 'background-color': '#3498db', 'color': 'white', 'border': 'none', 'border-radius': '5px'}),
                 html.Button('Affiliations', id='affiliations-button', style={'display': 'block', 'background-color': '#3498db', 'color': 'white', 'border': 'none', 'border-radius': '5px'}),
+                html.Button('University Leaderboard', id='leaderboard-button', style={'display': 'block', 'margin-top': '5px', 'background-color': '#3498db', 'color': 'white', 'border': 'none', 'border-radius': '5px'}),
                 # Dropdown
                 dcc.Dropdown(
                     id='keyword-dropdown',
-                    options=[
-                        {'label': 'Massachusetts Institute of Technology (MIT)', 'value': 'Massachusetts Institute of Technology'},
-                        {'label': 'Stanford University', 'value': 'Stanford University'},
-                        {'label': 'Carnegie Mellon University', 'value': 'Carnegie Mellon University'},
-                        {'label': 'University of California--Berkeley', 'value': 'University of California--Berkeley'},
-                        {'label': 'California Institute of Technology (Caltech)', 'value': 'California Institute of Technology'},
-                        {'label': 'University of Illinois at Urbana-Champaign', 'value': 'University of illinois at Urbana Champaign'},
-                        {'label': 'University of Washington', 'value': 'University of Washington'},
-                        {'label': 'University of Texas at Austin', 'value': 'University of Texas at Austin'},
-                        {'label': 'Princeton University', 'value': 'Princeton University'},
-                        {'label': 'University of California--Los Angeles (UCLA)', 'value': 'University of California--Los Angeles'}
-                    ],
+                    # Options are loaded from the cached affiliation list on page load
+                    options=[],
                     placeholder='Select a university',
                     style={'margin-top': '5px', 'width': '100%', 'border': '1px solid #ccc', 'border-radius': '5px'}
                 ),
+                html.Div(id='ratio-display', style={'margin-top': '5px'}),
                 html.Div([
                     html.Div(id='publication-keywords-input', style={'margin-top': '10px'}, children=[
                         dcc.Input(
@@ -116,7 +99,7 @@ app.layout = html.Div([
             ], style={'padding': '10px', 'width': '48%', 'background-color': '#ecf0f1', 'border': '1px solid #ccc', 'border-radius': '10px'}),
 
             # Summary box
-            html.Div(id='summary-box', style={
+            html.Div("Click a button to see results", id='summary-box', style={
                 'border': '2px solid black',
                 'padding': '20px',
                 'width': '48%',
@@ -142,6 +125,8 @@ app.layout = html.Div([
                     value=[1900, 2023],
                     marks={i: f'{i}' for i in range(1900, 2024, 10)},
                     tooltip={"placement": "bottom", "always_visible": True},
+                    # Only report the range once the handle is released, not on every drag tick
+                    updatemode='mouseup',
                 ),
                 html.Div([
                     html.Span('Year Start', style={'float': 'left'}),
@@ -155,22 +140,31 @@ app.layout = html.Div([
     ]),
 
     html.Div([
-        # Create a place to display results
-        html.Div(id='results-display', style={
-            'margin-top': '20px',
-            'border': '2px solid black',
-            'padding': '20px',
-            'width': '65%',
-            'height': '300px',
-            'overflow-y': 'auto',
-            'border-radius': '10px',
-            'box-sizing': 'border-box',
-            'background-color': '#f9f9f9'
-        }),
+        # Create a place to display results, one page at a time
+        html.Div([
+            html.Div("Click 'Search' to see results", id='results-display', style={
+                'margin-top': '20px',
+                'border': '2px solid black',
+                'padding': '20px',
+                'height': '300px',
+                'overflow-y': 'auto',
+                'border-radius': '10px',
+                'box-sizing': 'border-box',
+                'background-color': '#f9f9f9'
+            }),
+            html.Button('Load more', id='load-more-button', disabled=True, style={'height': '30px', 'margin-top': '5px', 'background-color': '#3498db', 'color': 'white', 'border': 'none', 'border-radius': '5px'}),
+            # Query, year range and page cursors of the current search
+            dcc.Store(id='search-state'),
+            # Rows of the latest search page, and all rows shown so far (kept in the browser)
+            dcc.Store(id='search-page'),
+            dcc.Store(id='search-results'),
+            # Favorites saved from the results, so re-rendered results stay "Saved"
+            dcc.Store(id='saved-items')
+        ], style={'width': '65%'}),
 
         # Favorites display
         html.Div([
-            html.Div(id='favorites-display', style={
+            html.Div("Click to see your favorite faculty and publication", id='favorites-display', style={
                 'margin-top': '20px',
                 'border': '2px solid black',
                 'padding': '20px',
@@ -180,7 +174,9 @@ app.layout = html.Div([
                 'border-radius': '10px',
                 'box-sizing': 'border-box',
                 'background-color': '#f9f9f9'
-            })
+            }),
+            # Favorite rows, rendered in the browser
+            dcc.Store(id='favorites-data')
         ], style={'margin-left': '20px', 'width': '30%'})
     ], style={'display': 'flex', 'align-items': 'center', 'justify-content': 'space-between'}),
 
@@ -252,83 +248,36 @@ app.layout = html.Div([
 
 
 
+# Search results and favorites are sent to the browser as compact rows and
+# rendered there by assets/dashboard.js with the classes from assets/styles.css
+faculty_fields = ['id', 'name', 'position', 'research_interest', 'email', 'phone', 'photo_url', 'university']
+publication_fields = ['id', 'title', 'venue', 'year', 'num_citations']
+
+# Helper to turn faculty query results into rows for the browser
+def faculty_rows(faculty_results):
+    return [{field: faculty_result[field] for field in faculty_fields} for faculty_result in faculty_results]
+
+# Helper to turn publication query results into rows for the browser, with their authors
+def publication_rows(publication_results):
+    # Fetch the authors of all publications in one query
+    authors_by_publication = mysql_utils.get_authors_by_publication_ids([pub['id'] for pub in publication_results])
+    rows = []
+    for publication_result in publication_results:
+        row = {field: publication_result[field] for field in publication_fields}
+        row['authors'] = authors_by_publication.get(publication_result['id'], [])
+        rows.append(row)
+    return rows
+
 # Helper function to Fetch favorite faculty and publications from the database
 def show_favorite():
-    favorite_faculty = mysql_utils.get_favorite_faculty()
-    favorite_publications = mysql_utils.get_favorite_publications()
-
-    favorite_elements = []
-    if favorite_faculty:
-        for faculty_result in favorite_faculty:
-            favorite_elements.append(html.Div([
-                html.H4(f"{faculty_result['name']}", style={'display': 'inline-block', 'margin-right': '10px'}),
-                html.Button(
-                    'Remove from Favorites', 
-                    id={'type': 'remove-button', 'index': faculty_result['id'], 'item_type': 'faculty'},
-                    style={
-                        'height': '40px',
-                        'background-color': '#e74c3c',
-                        'color': 'white',
-                        'border': 'none',
-                        'padding': '10px 20px',
-                        'text-align': 'center',
-                        'text-decoration': 'none',
-                        'display': 'inline-block',
-                        'font-size': '16px',
-                        'margin': '4px 2px',
-                        'cursor': 'pointer',
-                        'border-radius': '5px'
-                    }
-                ),
-                html.P(f"ID: {faculty_result['id'] or 'N/A'}"),
-                html.P(f"Position: {faculty_result['position'] or 'N/A'}"),
-                html.P(f"Research Interest: {faculty_result['research_interest'] or 'N/A'}"),
-                html.P(f"Email: {faculty_result['email'] or 'N/A'}"),
-                html.P(f"Phone: {faculty_result['phone'] or 'N/A'}"),
-                html.P(f"Affiliation: {faculty_result['university']}"),
-                html.Div(
-                    children=[
-                        html.Img(src=faculty_result['photo_url'], style={'width': '100px'})
-                    ],
-                    className='image-container'
-                ),
-                html.Hr()
-            ]))
-
-    if favorite_publications:
-        for publication_result in favorite_publications:
-            authors = [result['author'] for result in mysql_utils.get_author_by_publication_id(publication_result['id'])]
-            if not authors:
-                authors = 'N/A'
-            favorite_elements.append(html.Div([
-                html.H4(f"{publication_result['title']}", style={'display': 'inline-block', 'margin-right': '10px'}),
-                html.Button(
-                    'Remove from Favorites', 
-                    id={'type': 'remove-button', 'index': publication_result['id'], 'item_type': 'publication'},
-                    style={
-                        'height': '40px',
-                        'background-color': '#e74c3c',
-                        'color': 'white',
-                        'border': 'none',
-                        'padding': '10px 20px',
-                        'text-align': 'center',
-                        'text-decoration': 'none',
-                        'display': 'inline-block',
-                        'font-size': '16px',
-                        'margin': '4px 2px',
-                        'cursor': 'pointer',
-                        'border-radius': '5px'
-                    }
-                ),
-                html.P(f"ID: {publication_result['id'] or 'N/A'}"),
-                html.P(f"Venue: {publication_result['venue'] or 'N/A'}"),
-                html.P(f"Year: {publication_result['year'] or 'N/A'}"),
-                html.P(f"Number of Citations: {publication_result['num_citations'] or 'N/A'}"),
-                html.P(f"Author(s): " + "; ".join([author for author in authors])),
-                html.Hr()
-            ]))
+    return {
+        'faculty': faculty_rows(mysql_utils.get_favorite_faculty()),
+        'publication': publication_rows(mysql_utils.get_favorite_publications())
+    }
 
-    return html.Div(favorite_elements)
+# Helper to pick the result counts shown above the search results
+def search_counts(search_state):
+    return {key: search_state[key] for key in search_state if key.endswith(('_shown', '_total', '_total_is_estimate'))}
 
 # Generate colors for node chart
 def generate_random_color():
@@ -341,227 +290,255 @@ def assign_colors(nodes):
     return color_map
 
 
-# Combined callback to handle the widgets
+# Each widget has its own callback, so a click only sends and returns the
+# state of the widget it belongs to
+
+# Search results: new search, year range change and "Load more".
+# Only the rows of the requested page are sent, the browser appends them
 @app.callback(
-    [Output('summary-box', 'children'),
-     Output('results-display', 'children'),
-     Output('favorites-display', 'children'),
-     Output({'type': 'save-button', 'index': ALL, 'item_type': ALL}, 'n_clicks'),
-     Output({'type': 'remove-button', 'index': ALL, 'item_type': ALL}, 'n_clicks')],
+    [Output('search-page', 'data'),
+     Output('search-state', 'data')],
     [Input('search-button', 'n_clicks'),
      Input('year-range-slider', 'value'),
-     Input('keyword-dropdown', 'value'),
-     Input({'type': 'save-button', 'index': ALL, 'item_type': ALL}, 'n_clicks'),
-     Input('show-favorites-button', 'n_clicks'),
-     Input({'type': 'remove-button', 'index': ALL, 'item_type': ALL}, 'n_clicks'),
-     Input('faculty-button', 'n_clicks'),
-     Input('affiliations-button', 'n_clicks'),
-     Input('top-keywords-button', 'n_clicks'),
-     Input('calculate-krc-button-action', 'n_clicks')],
-    [State({'type': 'save-button', 'index': ALL, 'item_type': ALL}, 'id'),
-     State({'type': 'remove-button', 'index': ALL, 'item_type': ALL}, 'id')],
+     Input('load-more-button', 'n_clicks')],
     [State('search-bar', 'value'),
-     State('school-name-keyword-input', 'value'),
-     State('school-name-krc-input', 'value'),
-     State('keyword-krc-input', 'value')]
+     State('search-state', 'data')],
+    prevent_initial_call=True
 )
-
-# To check triggers, connect to database and then generate results 
-def display_results(search_clicks, year_range, selected_university, save_clicks, show_favorites_click, remove_clicks,
-                    faculty_clicks, affiliations_clicks, top_keywords_clicks, calculate_krc_clicks,
-                    sids, rids, query, school_name_keyword, school_name_krc, keyword_krc):
+def update_search_results(search_clicks, year_range, load_more_clicks, query, search_state):
     call = dash.callback_context
-
-    if not call.triggered:
-        return "Click a button to see results", "Click 'Search' to see results", "Click to see your favorite faculty and publication", save_clicks, remove_clicks
-
     triggered_input = call.triggered[0]['prop_id'].split('.')[0]
 
-    info_box_content = "Information based on the query results and widget parameters."
-
-    # Extract year range values
-    year_min, year_max = year_range
-
-    # Handle year range slider
-    if triggered_input == 'year-range-slider':
-        year_min, year_max = year_range
-        mysql_utils.search_by_year(year_min, year_max)
-
-    # Handle save to favorites buttons
-    if save_clicks:
-        # Create empty save_clicks as output to refresh save_clicks for each callback
-        save_clicks_records = [None] * len(save_clicks)
-
-        for i, n_click in enumerate(save_clicks):
-            if n_click:
-                item_id = sids[i]['index']
-                item_type = sids[i]['item_type']
-
-                save_clicks[i] = None
-
-                if item_type not in ['faculty', 'publication']:
-                    return dash.no_update, dash.no_update, dash.no_update, save_clicks, remove_clicks
-
-                if item_type=='faculty':
-                    mysql_utils.save_to_favorites_faculty(item_id)
-                else:
-                    mysql_utils.save_to_favorites_publication(item_id)
-
-                return dash.no_update, dash.no_update, dash.no_update, save_clicks_records, remove_clicks
+    # Handle load more button, send the next page of each result list
+    if triggered_input == 'load-more-button':
+        if not search_state:
+            return dash.no_update, dash.no_update
+        year_min, year_max = search_state['year_range']
+        faculty_results, publication_results = [], []
+        if search_state['faculty_cursor']:
+            page = mysql_utils.search_faculty_page(search_state['query'], cursor=search_state['faculty_cursor'])
+            search_state['faculty_cursor'] = page['next_cursor']
+            search_state['faculty_shown'] += len(page['rows'])
+            faculty_results = page['rows']
+        if search_state['publication_cursor']:
+            page = mysql_utils.search_publication_page(search_state['query'], year_min, year_max,
+                                                       cursor=search_state['publication_cursor'])
+            search_state['publication_cursor'] = page['next_cursor']
+            search_state['publication_shown'] += len(page['rows'])
+            publication_results = page['rows']
+        return {
+            'append': True,
+            'counts': search_counts(search_state),
+            'faculty': faculty_rows(faculty_results),
+            'publication': publication_rows(publication_results)
+        }, search_state
+
+    # Handle year range slider, re-run the current search with the new range
+    if triggered_input == 'year-range-slider' and not query:
+        return dash.no_update, dash.no_update
 
-    # Handle remove from favorites buttons
-    if remove_clicks:
-        for i, n_click in enumerate(remove_clicks):
-            if n_click:
-                item_id = rids[i]['index']
-                item_type = rids[i]['item_type']
+    # Handle search button
+    if not query:
+        return {'message': "Please enter a search query and click the search button."}, None
 
-                remove_clicks[i] = None
+    # Extract year range values, they are applied to the publication search of this request only
+    year_min, year_max = year_range
+    faculty_page = mysql_utils.search_faculty_page(query)
+    publication_page = mysql_utils.search_publication_page(query, year_min, year_max)
+
+    if not faculty_page['rows'] and not publication_page['rows']:
+        return {'message': "No results found."}, None
+
+    # Remember the query and page cursors so "Load more" continues this search
+    search_state = {'query': query, 'year_range': [year_min, year_max]}
+    for kind, page in (('faculty', faculty_page), ('publication', publication_page)):
+        search_state[f'{kind}_cursor'] = page['next_cursor']
+        search_state[f'{kind}_shown'] = len(page['rows'])
+        search_state[f'{kind}_total'] = page['total']
+        search_state[f'{kind}_total_is_estimate'] = page['total_is_estimate']
+
+    return {
+        'append': False,
+        'counts': search_counts(search_state),
+        'faculty': faculty_rows(faculty_page['rows']),
+        'publication': publication_rows(publication_page['rows'])
+    }, search_state
+
+# Render search results in the browser, appending "Load more" pages to the rows kept there
+clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='renderResults'),
+    [Output('results-display', 'children'),
+     Output('search-results', 'data')],
+    [Input('search-page', 'data')],
+    [State('search-results', 'data'),
+     State('saved-items', 'data')]
+)
 
-                if item_type not in ['faculty', 'publication']:
-                    return dash.no_update, dash.no_update, dash.no_update, save_clicks, remove_clicks
+# Keep the saved/removed favorites in the browser for renderResults
+clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='trackSaved'),
+    Output('saved-items', 'data'),
+    [Input({'type': 'save-button', 'index': ALL, 'item_type': ALL}, 'disabled'),
+     Input({'type': 'remove-button', 'index': ALL, 'item_type': ALL}, 'n_clicks')],
+    [State('saved-items', 'data')],
+    prevent_initial_call=True
+)
 
-                if item_type=='faculty':
-                    mysql_utils.remove_from_favorites_faculty(item_id)
-                else:
-                    mysql_utils.remove_from_favorites_publication(item_id)
+# Save to favorites, only the clicked button is involved
+@app.callback(
+    [Output({'type': 'save-button', 'index': MATCH, 'item_type': MATCH}, 'children'),
+     Output({'type': 'save-button', 'index': MATCH, 'item_type': MATCH}, 'disabled')],
+    [Input({'type': 'save-button', 'index': MATCH, 'item_type': MATCH}, 'n_clicks')],
+    [State({'type': 'save-button', 'index': MATCH, 'item_type': MATCH}, 'id')],
+    prevent_initial_call=True
+)
+def save_favorite(n_clicks, button_id):
+    if not n_clicks:
+        return dash.no_update, dash.no_update
+    if button_id['item_type'] == 'faculty':
+        mysql_utils.save_to_favorites_faculty(button_id['index'])
+    elif button_id['item_type'] == 'publication':
+        mysql_utils.save_to_favorites_publication(button_id['index'])
+    else:
+        return dash.no_update, dash.no_update
+    return 'Saved', True
 
-                return dash.no_update, dash.no_update, show_favorite(), save_clicks, remove_clicks
+# Show favorites
+@app.callback(
+    Output('favorites-data', 'data'),
+    [Input('show-favorites-button', 'n_clicks')],
+    prevent_initial_call=True
+)
+def update_favorites(show_favorites_click):
+    return show_favorite()
+
+# Render favorites in the browser
+clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='renderFavorites'),
+    Output('favorites-display', 'children'),
+    [Input('favorites-data', 'data')]
+)
 
-    # Handle show favorites button
-    if triggered_input == 'show-favorites-button':
-        return dash.no_update, dash.no_update, show_favorite(), save_clicks, remove_clicks
+# Remove from favorites, hides the removed entry instead of re-rendering the list
+@app.callback(
+    Output({'type': 'favorite-item', 'index': MATCH, 'item_type': MATCH}, 'style'),
+    [Input({'type': 'remove-button', 'index': MATCH, 'item_type': MATCH}, 'n_clicks')],
+    [State({'type': 'remove-button', 'index': MATCH, 'item_type': MATCH}, 'id')],
+    prevent_initial_call=True
+)
+def remove_favorite(n_clicks, button_id):
+    if not n_clicks:
+        return dash.no_update
+    if button_id['item_type'] == 'faculty':
+        mysql_utils.remove_from_favorites_faculty(button_id['index'])
+    elif button_id['item_type'] == 'publication':
+        mysql_utils.remove_from_favorites_publication(button_id['index'])
+    else:
+        return dash.no_update
+    return {'display': 'none'}
 
-    # Handle search button
-    if triggered_input == 'search-button':
-        if not query:
-            return dash.no_update, "Please enter a search query and click the search button.", dash.no_update, save_clicks, remove_clicks
-        faculty_results = mysql_utils.search_faculty_by_name(query)
-        publication_results = mysql_utils.search_publication_by_title(query)
-
-        if not faculty_results and not publication_results:
-            return dash.no_update, "No results found.", dash.no_update, save_clicks, remove_clicks
-        result_elements = []
-
-        for faculty_result in faculty_results:
-            result_elements.append(
-                html.Div([
-                    html.H4(f"{faculty_result['name']}", style={'margin-right': '5px',}),
-                    html.Button(
-                        'Save to Favorites', 
-                        id={'type': 'save-button', 'index': faculty_result['id'], 'item_type': 'faculty'},
-                        style={
-                            'height': '40px',
-                            'background-color': '#3498db',
-                            'color': 'white',
-                            'border': 'none',
-                            'padding': '10px 20px',
-                            'text-align': 'center',
-                            'text-decoration': 'none',
-                            'display': 'inline-block',
-                            'font-size': '16px',
-                            'margin': '4px 2px',
-                            'cursor': 'pointer',
-                            'border-radius': '5px',
-                            'margin-left': 'auto',
-                        }
-                    )
-                ], style={'display': 'flex', 'align-items': 'center'})
-            )
-            result_elements.append(html.P(f"ID: {faculty_result['id'] or 'N/A'}"))
-            result_elements.append(html.P(f"Position: {faculty_result['position'] or 'N/A'}"))
-            result_elements.append(html.P(f"Research Interest: {faculty_result['research_interest'] or 'N/A'}"))
-            result_elements.append(html.P(f"Email: {faculty_result['email'] or 'N/A'}"))
-            result_elements.append(html.P(f"Phone: {faculty_result['phone'] or 'N/A'}"))
-            result_elements.append(html.P(f"Affiliation: {faculty_result['university']}"))
-
-            # Set photo_url if not valid the CSS show the background image "default_photo.jpg". Not a perfect solution but I tried.
-            photo_url = faculty_result['photo_url']
-            result_elements.append(html.Div(
-                children=[
-                    html.Img(src=photo_url, style={'width': '100px'})
-                ],
-                className='image-container'
-            ))
-
-            result_elements.append(html.Hr())
-
-        for publication_result in publication_results:
-            authors = [result['author'] for result in mysql_utils.get_author_by_publication_id(publication_result['id'])]
-            if not authors:
-                authors = 'N/A'
-                
-            result_elements.append(html.Div([
-                html.H4(f"{publication_result['title']}", style={'margin-right': '5px',}),
-                html.Button(
-                        'Save to Favorites', 
-                        id={'type': 'save-button', 'index': publication_result['id'], 'item_type': 'publication'},
-                        style={
-                            'height': '40px',
-                            'background-color': '#3498db',
-                            'color': 'white',
-                            'border': 'none',
-                            'padding': '10px 20px',
-                            'text-align': 'center',
-                            'text-decoration': 'none',
-                            'display': 'inline-block',
-                            'font-size': '16px',
-                            'margin': '4px 2px',
-                            'cursor': 'pointer',
-                            'border-radius': '5px',
-                            'margin-left': 'auto',
-                        }
-                    )
-            ], style={'display': 'flex', 'align-items': 'center'}))
-
-            result_elements.append(html.P(f"ID: {publication_result['id'] or 'N/A'}"))
-            result_elements.append(html.P(f"Venue: {publication_result['venue'] or 'N/A'}"))
-            result_elements.append(html.P(f"Year: {publication_result['year'] or 'N/A'}"))
-            result_elements.append(html.P(f"Number of Citations: {publication_result['num_citations'] or 'N/A'}"))
-            result_elements.append(html.P(f"Author(s): " + "; ".join([author for author in authors])))
-            result_elements.append(html.Hr())
-
-        return dash.no_update, html.Div(result_elements), dash.no_update, save_clicks, remove_clicks
+# Tags: faculty count, affiliations, top keywords, KRC and leaderboard in the summary box
+@app.callback(
+    Output('summary-box', 'children'),
+    [Input('faculty-button', 'n_clicks'),
+     Input('affiliations-button', 'n_clicks'),
+     Input('top-keywords-button', 'n_clicks'),
+     Input('calculate-krc-button-action', 'n_clicks'),
+     Input('leaderboard-button', 'n_clicks')],
+    [State('school-name-keyword-input', 'value'),
+     State('school-name-krc-input', 'value'),
+     State('keyword-krc-input', 'value')],
+    prevent_initial_call=True
+)
+def update_summary(faculty_clicks, affiliations_clicks, top_keywords_clicks, calculate_krc_clicks, leaderboard_clicks,
+                   school_name_keyword, school_name_krc, keyword_krc):
+    call = dash.callback_context
+    triggered_input = call.triggered[0]['prop_id'].split('.')[0]
 
     # Handling Tag related buttons
-    elif triggered_input == 'faculty-button':
+    if triggered_input == 'faculty-button':
         faculty_count = mongodb_utils.get_faculty_cnt()
-        return f"Total number of faculty: {faculty_count}", dash.no_update, dash.no_update, save_clicks, remove_clicks
+        return f"Total number of faculty: {faculty_count}"
 
     elif triggered_input == 'affiliations-button':
-        affiliation_count = mongodb_utils.get_affiliation_count()
-        affiliations = mongodb_utils.get_all_affiliations()
-        affiliations_list = [aff['name'] for aff in affiliations]
+        affiliation_summary = mongodb_utils.get_affiliation_summary()
+        affiliation_count = affiliation_summary['count']
+        affiliations_list = [aff['name'] for aff in affiliation_summary['affiliations']]
         return html.Div([
             html.P(f"Total number of affiliations: {affiliation_count}"),
             html.P("Affiliations:"),
             html.Ul([html.Li(aff) for aff in affiliations_list])
-        ]), dash.no_update, dash.no_update, save_clicks, remove_clicks
+        ])
 
     elif triggered_input == 'top-keywords-button':
         if not school_name_keyword:
-            return "Please enter a school name.", dash.no_update, dash.no_update, save_clicks, remove_clicks
+            return "Please enter a school name."
         top_keywords = mongodb_utils.top_keywords_by_school(school_name_keyword)
         if not top_keywords:
-            return "No keywords found.", dash.no_update, dash.no_update, save_clicks, remove_clicks
+            return "No keywords found."
         keywords_list = [html.Li(keyword['_id']) for keyword in top_keywords]
-        return html.Ul(keywords_list), dash.no_update, dash.no_update, save_clicks, remove_clicks
+        return html.Ul(keywords_list)
 
     elif triggered_input == 'calculate-krc-button-action':
         if not (school_name_krc and keyword_krc):
-            return "Please enter both a school name and a keyword.", dash.no_update, dash.no_update, save_clicks, remove_clicks
+            return "Please enter both a school name and a keyword."
         krc_results = mongodb_utils.calculate_krc(school_name_krc, keyword_krc)
         if not krc_results:
-            return "No results found.", dash.no_update, dash.no_update, save_clicks, remove_clicks
+            return "No results found."
         krc_elements = [html.Div([html.H4(f"Faculty: {result['_id']}"), html.P(f"KRC: {result['KRC']}")]) for result in krc_results]
-        return html.Div(krc_elements), dash.no_update, dash.no_update, save_clicks, remove_clicks
+        return html.Div(krc_elements)
+
+    elif triggered_input == 'leaderboard-button':
+        leaderboard = services.university_leaderboard()
+        if not leaderboard:
+            return "No results found."
+        return html.Table([
+            html.Tr([html.Th('#'), html.Th('University'), html.Th('Faculty'), html.Th('Ratio')])
+        ] + [
+            html.Tr([html.Td(row['rank']), html.Td(row['university']), html.Td(row['university_faculty_count']), html.Td(f"{row['ratio']:.2%}")])
+            for row in leaderboard
+        ])
+
+    return "Unknown action"
+
+# University faculty ratio of the dropdown selection
+@app.callback(
+    Output('ratio-display', 'children'),
+    [Input('keyword-dropdown', 'value')],
+    prevent_initial_call=True
+)
+def update_university_ratio(selected_university):
+    return display_university_faculty_ratio(selected_university)
+
+# Fill the university dropdown from the cached affiliation list when the page loads
+@app.callback(
+    Output('keyword-dropdown', 'options'),
+    [Input('url', 'pathname')]
+)
+def load_university_options(pathname):
+    return [{'label': aff['name'], 'value': aff['name']} for aff in mongodb_utils.get_all_affiliations()]
+
+# Enable "Load more" only while the current search has further pages
+clientside_callback(
+    """
+    function(searchState) {
+        return !(searchState && (searchState.faculty_cursor || searchState.publication_cursor));
+    }
+    """,
+    Output('load-more-button', 'disabled'),
+    Input('search-state', 'data')
+)
 
-    # Handle keyword-dropdown applications and call REST API
-    elif triggered_input == 'keyword-dropdown':
-        if selected_university:      
-            return display_university_faculty_ratio(selected_university), dash.no_update, dash.no_update, save_clicks, remove_clicks
+# Liveness: the process is up and serving requests
+@server.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({"status": "ok"})
 
-    return "Unknown action", "Unknown action", dash.no_update, save_clicks, remove_clicks
+# Readiness: indexes are created and caches are warm (503 until then)
+@server.route('/readyz', methods=['GET'])
+def readyz():
+    ready = warmup.ready()
+    return jsonify({"status": "ready" if ready else "starting", "tasks": warmup.status()}), 200 if ready else 503
 
 # REST API to access neo4j database with "GET" method
 @server.route('/api/get_university_faculty_ratio', methods=['GET'])
@@ -570,27 +547,27 @@ def api_get_university_faculty_ratio():
     if not university_name:
         return jsonify({"error": "Please provide a university name"}), 400
     try:
-        total_faculty_count, university_faculty_count, ratio = neo4j_utils.get_university_faculty_ratio(university_name)
-        return jsonify({
-            "total_faculty_count": total_faculty_count,
-            "university_faculty_count": university_faculty_count,
-            "ratio": ratio
-        })
+        return jsonify(services.university_faculty_ratio(university_name))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
-# To calculate KRC
+# REST API for the ranked faculty counts of all universities, optional ?limit=N
+@server.route('/api/get_university_leaderboard', methods=['GET'])
+def api_get_university_leaderboard():
+    limit = request.args.get('limit', type=int)
+    try:
+        return jsonify(services.university_leaderboard(limit))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# To display the faculty ratio, served in-process by the same service as the REST API
 def display_university_faculty_ratio(university_name):
     if university_name:
         try:
-            response = requests.get(f'http://localhost:8050/api/get_university_faculty_ratio?university_name={university_name}')
-            if response.status_code == 200:
-                data = response.json()
-                return (f"Total Faculty: {data['total_faculty_count']}, "
-                        f"{university_name} Faculty: {data['university_faculty_count']}, "
-                        f"Ratio: {data['ratio']:.2%}")
-            else:
-                return f"An error occurred: {response.json()['error']}"
+            data = services.university_faculty_ratio(university_name)
+            return (f"Total Faculty: {data['total_faculty_count']}, "
+                    f"{university_name} Faculty: {data['university_faculty_count']}, "
+                    f"Ratio: {data['ratio']:.2%}")
         except Exception as e:
             return f"An error occurred: {str(e)}"
     return "Please select a university"
@@ -611,7 +588,12 @@ def update_publications_graphs(n_clicks, faculty_id):
     if not call.triggered:
         return go.Figure(), dash.no_update, dash.no_update
 
-    publications = mysql_utils.get_top_cited_publications(faculty_id)
+    if faculty_id is None:
+        return dash.no_update, dash.no_update, dash.no_update
+
+    # Top publications, keyword frequencies and collaboration network are fetched concurrently
+    insight = services.faculty_insight(int(faculty_id))
+    publications = insight['top_cited_publications']
     
     # Generate 
     if triggered_input == 'show-publications-button' and publications:
@@ -636,17 +618,23 @@ def update_publications_graphs(n_clicks, faculty_id):
         # Add hover text to show titles on hover
         figure.update_traces(hovertext=titles, hoverinfo='text+y')
 
-        # Fetch word frequencies from the database
-        word_frequencies = mysql_utils.get_research_interest_frequencies(faculty_id)
+        # Word frequencies from the database
+        word_frequencies = insight['keyword_frequencies']
         if not word_frequencies:
-            return dash.no_update, dash.no_update
+            return figure, dash.no_update, dash.no_update
 
-        wordcloud_image = generate_wordcloud_from_frequencies(dict(word_frequencies))
+        # Cached per faculty and frequencies, rendered in a process pool on a miss.
+        # A failed or timed out render leaves the word cloud empty, not the whole panel
+        try:
+            wordcloud_image = wordcloud_utils.get_wordcloud(faculty_id, dict(word_frequencies))
+        except Exception as e:
+            logger.warning("word cloud of faculty %s failed: %r", faculty_id, e)
+            wordcloud_image = ''
 
-        # Get faculty nodes and collaborations for the specified faculty member
-        faculty_name = mysql_utils.get_faculty_name_from_id(faculty_id)[0]
-        faculty_nodes = neo4j_utils.get_faculty_nodes_for_faculty(faculty_name)
-        collaborations = neo4j_utils.get_collaborations_for_faculty(faculty_name)
+        # Faculty nodes and collaborations of the faculty member, kept as is if the graph query failed
+        if insight['collaboration_network'] is None:
+            return figure, wordcloud_image, dash.no_update
+        faculty_nodes, collaborations = insight['collaboration_network']
 
         # Assign colors to nodes
         color_map = assign_colors(faculty_nodes)
@@ -664,6 +652,13 @@ def update_publications_graphs(n_clicks, faculty_id):
         return dash.no_update, dash.no_update, dash.no_update
     
 
+# Instrument the callbacks registered above and serve everything recorded on /metrics
+if metrics.enabled:
+    metrics.instrument_callbacks(app)
+    metrics.register_route(server)
 
+# Development server. For production use wsgi.py (gunicorn -c gunicorn.conf.py);
+# DASHBOARD_DEBUG=1 turns on the debugger and reloader
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    warmup.start()
+    app.run(debug=os.environ.get('DASHBOARD_DEBUG', '') not in ('', '0', 'false', 'False'))
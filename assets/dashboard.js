@@ -0,0 +1,149 @@
+// Client-side rendering of search results and favorites. The server only
+// sends compact row data (dcc.Store), the component trees are built here.
+(function () {
+    function el(type, props, children) {
+        props = props || {};
+        if (children !== undefined) {
+            props.children = children;
+        }
+        return {type: type, namespace: 'dash_html_components', props: props};
+    }
+
+    // Same as Python's `value or 'N/A'`
+    function orNA(value) {
+        return value ? value : 'N/A';
+    }
+
+    function button(type, label, row, itemType) {
+        return el('Button', {
+            id: {type: type, index: row.id, item_type: itemType},
+            className: type
+        }, label);
+    }
+
+    function facultyFields(row) {
+        return [
+            el('P', {}, 'ID: ' + orNA(row.id)),
+            el('P', {}, 'Position: ' + orNA(row.position)),
+            el('P', {}, 'Research Interest: ' + orNA(row.research_interest)),
+            el('P', {}, 'Email: ' + orNA(row.email)),
+            el('P', {}, 'Phone: ' + orNA(row.phone)),
+            el('P', {}, 'Affiliation: ' + row.university),
+            // If photo_url is not valid the CSS shows the background image "default_photo.jpg"
+            el('Div', {className: 'image-container'}, [el('Img', {src: row.photo_url})]),
+            el('Hr')
+        ];
+    }
+
+    function publicationFields(row) {
+        var authors = row.authors && row.authors.length ? row.authors : ['N/A'];
+        return [
+            el('P', {}, 'ID: ' + orNA(row.id)),
+            el('P', {}, 'Venue: ' + orNA(row.venue)),
+            el('P', {}, 'Year: ' + orNA(row.year)),
+            el('P', {}, 'Number of Citations: ' + orNA(row.num_citations)),
+            el('P', {}, 'Author(s): ' + authors.join('; ')),
+            el('Hr')
+        ];
+    }
+
+    // Key of a favorite in the saved-items store
+    function savedKey(itemType, index) {
+        return itemType + ':' + index;
+    }
+
+    // Rows saved already keep the "Saved" state set by save_favorite
+    function searchResult(row, itemType, title, fields, saved) {
+        var save = button('save-button', 'Save to Favorites', row, itemType);
+        if (saved[savedKey(itemType, row.id)]) {
+            save = button('save-button', 'Saved', row, itemType);
+            save.props.disabled = true;
+        }
+        return el('Div', {}, [
+            el('Div', {className: 'result-header'}, [
+                el('H4', {}, String(title)),
+                save
+            ])
+        ].concat(fields(row)));
+    }
+
+    function favorite(row, itemType, title, fields) {
+        return el('Div', {id: {type: 'favorite-item', index: row.id, item_type: itemType}}, [
+            el('Span', {className: 'favorite-header'}, [
+                el('H4', {}, String(title)),
+                button('remove-button', 'Remove from Favorites', row, itemType)
+            ])
+        ].concat(fields(row)));
+    }
+
+    function describe(counts, kind) {
+        var total = counts[kind + '_total'] + (counts[kind + '_total_is_estimate'] ? '+' : '');
+        return counts[kind + '_shown'] + ' of ' + total + ' ' + kind;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard: {
+            // page: {message} or {append, counts, faculty: [rows], publication: [rows]}
+            // results: rows already shown, kept in the browser for "Load more"
+            // saved: {"faculty:<id>": true, ...} favorites saved in this session
+            renderResults: function (page, results, saved) {
+                if (!page) {
+                    return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+                }
+                if (page.message) {
+                    return [page.message, null];
+                }
+                if (page.append && results) {
+                    results = {
+                        faculty: results.faculty.concat(page.faculty),
+                        publication: results.publication.concat(page.publication)
+                    };
+                } else {
+                    results = {faculty: page.faculty, publication: page.publication};
+                }
+                saved = saved || {};
+                var children = [
+                    el('P', {}, 'Showing ' + describe(page.counts, 'faculty') + ' and ' +
+                        describe(page.counts, 'publication') + ' results.'),
+                    el('Div', {}, results.faculty.map(function (row) {
+                        return searchResult(row, 'faculty', row.name, facultyFields, saved);
+                    })),
+                    el('Div', {}, results.publication.map(function (row) {
+                        return searchResult(row, 'publication', row.title, publicationFields, saved);
+                    }))
+                ];
+                return [children, results];
+            },
+
+            // Record saved favorites (a save button disabled by save_favorite)
+            // and forget removed ones, so re-rendered results stay "Saved"
+            trackSaved: function (disabled, removeClicks, saved) {
+                saved = Object.assign({}, saved);
+                window.dash_clientside.callback_context.triggered.forEach(function (trigger) {
+                    if (!trigger.value) {
+                        return;
+                    }
+                    var id = JSON.parse(trigger.prop_id.slice(0, trigger.prop_id.lastIndexOf('.')));
+                    if (id.type === 'save-button') {
+                        saved[savedKey(id.item_type, id.index)] = true;
+                    } else {
+                        delete saved[savedKey(id.item_type, id.index)];
+                    }
+                });
+                return saved;
+            },
+
+            // favorites: {faculty: [rows], publication: [rows]}
+            renderFavorites: function (favorites) {
+                if (!favorites) {
+                    return window.dash_clientside.no_update;
+                }
+                return favorites.faculty.map(function (row) {
+                    return favorite(row, 'faculty', row.name, facultyFields);
+                }).concat(favorites.publication.map(function (row) {
+                    return favorite(row, 'publication', row.title, publicationFields);
+                }));
+            }
+        }
+    });
+})();
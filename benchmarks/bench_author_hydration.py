@@ -0,0 +1,43 @@
+# Compare author hydration of a title search: one query per publication
+# (get_author_by_publication_id) against the batched get_authors_by_publication_ids.
+# Needs the academicworld MySQL database configured in mysql_utils.
+#
+#   python benchmarks/bench_author_hydration.py "learning"
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import mysql_utils
+
+
+def measure(label, fn):
+    before = mysql_utils.pool_stats()['checkouts']
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    checkouts = mysql_utils.pool_stats()['checkouts'] - before
+    print(f"{label:<10} connection checkouts: {checkouts:>6}   time: {elapsed * 1000:9.1f} ms")
+    return result
+
+
+def per_row(query):
+    publications = mysql_utils.search_publication_by_title(query)
+    return {pub['id']: [row['author'] for row in mysql_utils.get_author_by_publication_id(pub['id'])]
+            for pub in publications}
+
+
+def batched(query):
+    publications = mysql_utils.search_publication_by_title(query)
+    return mysql_utils.get_authors_by_publication_ids([pub['id'] for pub in publications])
+
+
+if __name__ == '__main__':
+    query = sys.argv[1] if len(sys.argv) > 1 else 'learning'
+    # Warm the pool so both runs pay the same connection cost
+    mysql_utils.get_connection().close()
+    old = measure('per-row', lambda: per_row(query))
+    new = measure('batched', lambda: batched(query))
+    same = {k: sorted(v) for k, v in old.items()} == {k: sorted(v) for k, v in new.items()}
+    print(f"{len(new)} publications, same authors: {same}")
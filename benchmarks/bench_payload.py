@@ -0,0 +1,81 @@
+# Response size and server serialization time of a search page sent as
+# server-built components with inline styles (the previous rendering)
+# versus compact rows rendered in the browser by assets/dashboard.js.
+# Uses synthetic rows, needs dash and plotly but no database.
+#
+#   python benchmarks/bench_payload.py 50 500 5000
+import json
+import sys
+import time
+
+import plotly
+from dash import html
+
+BUTTON_STYLE = {
+    'height': '40px', 'background-color': '#3498db', 'color': 'white', 'border': 'none',
+    'padding': '10px 20px', 'text-align': 'center', 'text-decoration': 'none',
+    'display': 'inline-block', 'font-size': '16px', 'margin': '4px 2px', 'cursor': 'pointer',
+    'border-radius': '5px', 'margin-left': 'auto',
+}
+
+
+def synthetic_rows(n):
+    faculty = [{
+        'id': i, 'name': f"Faculty Member {i}", 'position': 'Associate Professor',
+        'research_interest': 'machine learning, databases, information retrieval',
+        'email': f"faculty{i}@example.edu", 'phone': '(217) 555-0100',
+        'photo_url': f"https://example.edu/photos/{i}.jpg", 'university': 'Example University',
+    } for i in range(n)]
+    publications = [{
+        'id': i, 'title': f"A study of scalable query processing, part {i}", 'venue': 'Proceedings of Example Conference',
+        'year': 2000 + i % 24, 'num_citations': i % 500, 'authors': [f"Author {i}", f"Author {i + 1}"],
+    } for i in range(n)]
+    return faculty, publications
+
+
+# The component tree the server used to build for each row
+def component_page(faculty, publications):
+    elements = []
+    for row in faculty:
+        elements.append(html.Div([
+            html.H4(row['name'], style={'margin-right': '5px'}),
+            html.Button('Save to Favorites', id={'type': 'save-button', 'index': row['id'], 'item_type': 'faculty'}, style=BUTTON_STYLE)
+        ], style={'display': 'flex', 'align-items': 'center'}))
+        elements += [html.P(f"ID: {row['id']}"), html.P(f"Position: {row['position']}"),
+                     html.P(f"Research Interest: {row['research_interest']}"), html.P(f"Email: {row['email']}"),
+                     html.P(f"Phone: {row['phone']}"), html.P(f"Affiliation: {row['university']}"),
+                     html.Div([html.Img(src=row['photo_url'], style={'width': '100px'})], className='image-container'),
+                     html.Hr()]
+    for row in publications:
+        elements.append(html.Div([
+            html.H4(row['title'], style={'margin-right': '5px'}),
+            html.Button('Save to Favorites', id={'type': 'save-button', 'index': row['id'], 'item_type': 'publication'}, style=BUTTON_STYLE)
+        ], style={'display': 'flex', 'align-items': 'center'}))
+        elements += [html.P(f"ID: {row['id']}"), html.P(f"Venue: {row['venue']}"), html.P(f"Year: {row['year']}"),
+                     html.P(f"Number of Citations: {row['num_citations']}"),
+                     html.P("Author(s): " + "; ".join(row['authors'])), html.Hr()]
+    return html.Div(elements)
+
+
+def compact_page(faculty, publications):
+    return {'append': False, 'counts': {}, 'faculty': faculty, 'publication': publications}
+
+
+def serialize(build, faculty, publications, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = json.dumps(build(faculty, publications), cls=plotly.utils.PlotlyJSONEncoder)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(payload.encode('utf-8')), best * 1000
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 500, 5000]
+    print(f"{'rows':>6}{'components KB':>16}{'ms':>9}{'compact KB':>13}{'ms':>9}{'size':>8}")
+    for n in sizes:
+        faculty, publications = synthetic_rows(n)
+        old_bytes, old_ms = serialize(component_page, faculty, publications)
+        new_bytes, new_ms = serialize(compact_page, faculty, publications)
+        print(f"{n:>6}{old_bytes / 1024:>16.1f}{old_ms:>9.1f}{new_bytes / 1024:>13.1f}{new_ms:>9.1f}{new_bytes / old_bytes:>8.0%}")
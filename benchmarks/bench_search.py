@@ -0,0 +1,56 @@
+# Latency of the indexed faculty/publication search against the original
+# unbounded LIKE '%term%' scans. Needs the academicworld MySQL database
+# configured in mysql_utils with python mysql_migrations.py applied.
+#
+#   python benchmarks/bench_search.py learning data "john" ab
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import mysql_utils
+
+LIKE_FACULTY = """
+    SELECT faculty.id, faculty.name, university.name AS university
+    FROM faculty, university
+    WHERE faculty.university_id = university.id AND faculty.name LIKE %s
+"""
+LIKE_PUBLICATION = """
+    SELECT id, title, venue, year, num_citations
+    FROM publication
+    WHERE title LIKE %s
+"""
+
+
+def like_scan(sql_query, term):
+    conn = mysql_utils.get_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql_query, (f"%{term}%",))
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(rows)
+
+
+if __name__ == '__main__':
+    terms = sys.argv[1:] or ['learning', 'data', 'network', 'john', 'ab']
+    repeat = 5
+    mysql_utils.get_connection().close()
+    print(f"{'term':<12}{'kind':<13}{'LIKE ms':>10}{'rows':>8}{'indexed ms':>12}{'rows':>6}")
+    for term in terms:
+        for kind, like_sql, search in (
+                ('faculty', LIKE_FACULTY, lambda: mysql_utils.search_faculty_by_name(term)),
+                ('publication', LIKE_PUBLICATION, lambda: mysql_utils.search_publication_by_title(term))):
+            like_ms, like_rows = timed(lambda: like_scan(like_sql, term), repeat)
+            search_ms, search_rows = timed(search, repeat)
+            print(f"{term:<12}{kind:<13}{like_ms:>10.1f}{like_rows:>8}{search_ms:>12.1f}{search_rows:>6}")
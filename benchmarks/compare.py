@@ -0,0 +1,34 @@
+# Compare two benchmark result files written by benchmarks/run.py
+#
+#   python benchmarks/compare.py benchmarks/results/abc123.json benchmarks/results/def456.json
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def describe(result):
+    if result is None:
+        return 'missing'
+    if 'median_ms' in result:
+        return f"{result['median_ms']:.2f} ms"
+    return 'skipped' if 'skipped' in result else 'error'
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit("usage: compare.py BEFORE.json AFTER.json")
+    before, after = load(sys.argv[1]), load(sys.argv[2])
+    print(f"before: {before['meta']['commit']}  after: {after['meta']['commit']}")
+    if before['meta']['scale'] != after['meta']['scale']:
+        print(f"warning: different scales {before['meta']['scale']} vs {after['meta']['scale']}")
+    print(f"{'benchmark':<50}{'before':>14}{'after':>14}{'change':>10}")
+    for name in sorted(set(before['results']) | set(after['results'])):
+        a, b = before['results'].get(name), after['results'].get(name)
+        change = ''
+        if a and b and 'median_ms' in a and 'median_ms' in b and a['median_ms']:
+            change = f"{(b['median_ms'] - a['median_ms']) / a['median_ms']:+.0%}"
+        print(f"{name:<50}{describe(a):>14}{describe(b):>14}{change:>10}")
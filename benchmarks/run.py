@@ -0,0 +1,290 @@
+# Offline benchmark suite: seeds a synthetic AcademicWorld-shaped dataset
+# into local stand-ins, times the *_utils functions and the Dash callbacks,
+# and writes the timings as JSON that can be diffed between commits with
+# benchmarks/compare.py.
+#
+# Stand-ins:
+#   MySQL   a local MySQL server (mysql_utils host/user/password), seeded into
+#           --mysql-database. MySQL benchmarks are skipped if it is unreachable
+#   MongoDB mongomock by default, or a local mongod with --mongo-uri
+#   Neo4j   the in-memory graph stub in benchmarks/stubs.py
+#
+#   python benchmarks/run.py --scale small
+#   python benchmarks/run.py --faculty 2000 --publications 20000 --output before.json
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import cache_utils
+import mongodb_utils
+import mysql_migrations
+import mysql_utils
+import neo4j_utils
+import warmup
+import wordcloud_utils
+
+import seed
+import stubs
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def measure(fn, repeat, warmup):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    stats = {
+        'runs': repeat,
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.mean(samples), 3),
+        'min_ms': round(samples[0], 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+    }
+    if isinstance(result, (list, dict)):
+        stats['rows'] = len(result)
+    return stats
+
+
+def setup_mysql(args, data):
+    mysql_utils.database = args.mysql_database
+    mysql_utils.reset_pool()
+    try:
+        seed.seed_mysql(data, mysql_utils.host, mysql_utils.user, mysql_utils.password, args.mysql_database)
+        mysql_migrations.migrate()
+        return None
+    except Exception as e:
+        # The MySQL benchmarks are skipped
+        return f"MySQL unavailable: {e}"
+
+
+def setup_mongo(args, data):
+    if args.mongo_uri:
+        mongodb_utils.uri = args.mongo_uri
+        mongodb_utils.database = args.mongo_database
+        mongodb_utils.close_client()
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+        mongodb_utils.get_client = lambda: client
+    seed.seed_mongo(mongodb_utils.get_database(), data)
+    mongodb_utils.create_indexes()
+
+
+def setup_neo4j(data):
+    driver = stubs.Driver(stubs.Graph(data))
+    neo4j_utils.get_driver = lambda: driver
+
+
+# Sample arguments: the most prolific faculty member, the largest school and its most common keyword
+def pick_inputs(data):
+    counts = {}
+    for faculty_id, _ in data['faculty_publication']:
+        counts[faculty_id] = counts.get(faculty_id, 0) + 1
+    faculty_id = max(counts, key=counts.get)
+    school_sizes = {}
+    for f in data['faculty']:
+        school_sizes[f['university_id']] = school_sizes.get(f['university_id'], 0) + 1
+    university_id = max(school_sizes, key=school_sizes.get)
+    school = next(u['name'] for u in data['universities'] if u['id'] == university_id)
+    keyword_counts = {}
+    for _, keyword_id, _ in data['publication_keyword']:
+        keyword_counts[keyword_id] = keyword_counts.get(keyword_id, 0) + 1
+    keyword_id = max(keyword_counts, key=keyword_counts.get)
+    keyword = next(k['name'] for k in data['keywords'] if k['id'] == keyword_id)
+    publication_ids = [p['id'] for p in data['publications'][:500]]
+    return {'faculty_id': faculty_id, 'school': school, 'keyword': keyword, 'term': 'learning',
+            'publication_ids': publication_ids}
+
+
+def utils_benchmarks(inputs):
+    faculty_id, school, keyword, term = inputs['faculty_id'], inputs['school'], inputs['keyword'], inputs['term']
+
+    def cold(fn, *args):
+        def run():
+            fn.invalidate()
+            return fn(*args)
+        return run
+
+    return [
+        ('mysql.search_faculty_page', 'mysql', lambda: mysql_utils.search_faculty_page(term)['rows']),
+        ('mysql.search_publication_page', 'mysql', lambda: mysql_utils.search_publication_page(term, 1990, 2023)['rows']),
+        ('mysql.search_publication_page.short_term', 'mysql', lambda: mysql_utils.search_publication_page('a')['rows']),
+        ('mysql.get_authors_by_publication_ids', 'mysql', lambda: mysql_utils.get_authors_by_publication_ids(inputs['publication_ids'])),
+        ('mysql.get_top_cited_publications', 'mysql', lambda: mysql_utils.get_top_cited_publications(faculty_id)),
+        ('mysql.get_research_interest_frequencies', 'mysql', lambda: mysql_utils.get_research_interest_frequencies(faculty_id)),
+        ('mysql.refresh_faculty_keyword_scores', 'mysql', lambda: mysql_utils.refresh_faculty_keyword_scores()),
+        ('mysql.get_research_interest_frequencies.materialized', 'mysql', lambda: mysql_utils.get_research_interest_frequencies(faculty_id, limit=200)),
+        ('mysql.save_and_remove_favorite', 'mysql', lambda: (mysql_utils.save_to_favorites_publication(1), mysql_utils.remove_from_favorites_publication(1))),
+        ('mysql.get_favorite_faculty', 'mysql', lambda: mysql_utils.get_favorite_faculty()),
+        ('mongodb.get_faculty_cnt', 'mongodb', lambda: mongodb_utils.get_faculty_cnt()),
+        ('mongodb.get_affiliation_summary.cold', 'mongodb', cold(mongodb_utils.get_affiliation_summary)),
+        ('mongodb.get_affiliation_summary.cached', 'mongodb', lambda: mongodb_utils.get_affiliation_summary()),
+        ('mongodb.calculate_krc', 'mongodb', lambda: mongodb_utils.calculate_krc(school, keyword)),
+        ('mongodb.top_keywords_by_school', 'mongodb', lambda: mongodb_utils.top_keywords_by_school(school)),
+        ('mongodb.refresh_krc', 'mongodb', lambda: mongodb_utils.refresh_krc()),
+        ('mongodb.refresh_keyword_rollups', 'mongodb', lambda: mongodb_utils.refresh_keyword_rollups()),
+        ('mongodb.calculate_krc.materialized', 'mongodb', lambda: mongodb_utils.calculate_krc(school, keyword)),
+        ('mongodb.top_keywords_by_school.materialized', 'mongodb', lambda: mongodb_utils.top_keywords_by_school(school)),
+        ('neo4j.get_collaboration_network', 'neo4j', lambda: neo4j_utils.get_collaboration_network(faculty_id)[1]),
+        ('neo4j.get_institute_faculty_counts.cold', 'neo4j', cold(neo4j_utils.get_institute_faculty_counts)),
+        ('neo4j.get_university_faculty_ratio', 'neo4j', lambda: neo4j_utils.get_university_faculty_ratio(school)),
+    ]
+
+
+# Callbacks are timed through the Flask test client, including request
+# parsing and response serialization, like a browser request
+def callback_benchmarks(inputs):
+    import app
+
+    client = app.server.test_client()
+
+    def callback_key(output):
+        return next(key for key in app.app.callback_map if output in key)
+
+    def post(output, inputs_, state=(), changed=None):
+        key = callback_key(output)
+        outputs = [{'id': part.rsplit('.', 1)[0], 'property': part.rsplit('.', 1)[1]}
+                   for part in key.strip('.').split('...')]
+        body = {'output': key, 'outputs': outputs if len(outputs) > 1 else outputs[0],
+                'inputs': list(inputs_), 'state': list(state),
+                'changedPropIds': [changed or f"{inputs_[0]['id']}.{inputs_[0]['property']}"]}
+
+        def run():
+            response = client.post('/_dash-update-component', json=body)
+            if response.status_code not in (200, 204):
+                raise RuntimeError(f"{output}: HTTP {response.status_code} {response.data[:200]!r}")
+            return response.get_json() or {}
+        return run
+
+    search = post('search-page.data', [
+        {'id': 'search-button', 'property': 'n_clicks', 'value': 1},
+        {'id': 'year-range-slider', 'property': 'value', 'value': [1900, 2023]},
+        {'id': 'load-more-button', 'property': 'n_clicks', 'value': None},
+    ], [
+        {'id': 'search-bar', 'property': 'value', 'value': inputs['term']},
+        {'id': 'search-state', 'property': 'data', 'value': None},
+    ])
+    insight = post('top-cited-publications-graph.figure', [
+        {'id': 'show-publications-button', 'property': 'n_clicks', 'value': 1},
+    ], [
+        {'id': 'faculty-id-input', 'property': 'value', 'value': inputs['faculty_id']},
+    ])
+    summary_state = [
+        {'id': 'school-name-keyword-input', 'property': 'value', 'value': inputs['school']},
+        {'id': 'school-name-krc-input', 'property': 'value', 'value': inputs['school']},
+        {'id': 'keyword-krc-input', 'property': 'value', 'value': inputs['keyword']},
+    ]
+
+    def summary(button):
+        buttons = ['faculty-button', 'affiliations-button', 'top-keywords-button', 'calculate-krc-button-action', 'leaderboard-button']
+        return post('summary-box.children', [
+            {'id': b, 'property': 'n_clicks', 'value': 1 if b == button else None} for b in buttons
+        ], summary_state, changed=f"{button}.n_clicks")
+
+    return [
+        ('callback.update_search_results', 'mysql', search),
+        ('callback.update_publications_graphs', 'mysql', insight),
+        ('callback.update_summary.krc', 'mongodb', summary('calculate-krc-button-action')),
+        ('callback.update_summary.top_keywords', 'mongodb', summary('top-keywords-button')),
+        ('callback.update_summary.leaderboard', 'neo4j', summary('leaderboard-button')),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument('--scale', choices=sorted(seed.SCALES), default='small')
+    for name in ('universities', 'faculty', 'publications', 'keywords'):
+        parser.add_argument(f'--{name}', type=int, help=f"override the number of {name} of --scale")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--mysql-database', default='academicworld_bench')
+    parser.add_argument('--mongo-uri', help="local mongod to use instead of mongomock")
+    parser.add_argument('--mongo-database', default='academicworld_bench')
+    parser.add_argument('--shared-cache', action='store_true',
+                        help="keep the cross-process result cache on (by default every call hits the database)")
+    parser.add_argument('--only', help="run only benchmarks whose name contains this text")
+    parser.add_argument('--output', help="JSON file to write (default benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    scale = dict(seed.SCALES[args.scale])
+    for name in scale:
+        if getattr(args, name):
+            scale[name] = getattr(args, name)
+    if args.shared_cache:
+        cache_utils.shared_cache_path = os.path.join(tempfile.mkdtemp(prefix='query-cache-bench-'), 'cache.sqlite3')
+    else:
+        cache_utils.shared_cache_path = 'off'
+    print(f"Generating dataset: {scale}")
+    data = seed.generate(seed=args.seed, **scale)
+
+    skipped = {}
+    mysql_error = setup_mysql(args, data)
+    if mysql_error:
+        print(mysql_error)
+        skipped['mysql'] = mysql_error
+    setup_mongo(args, data)
+    setup_neo4j(data)
+    wordcloud_utils.disk_cache_dir = tempfile.mkdtemp(prefix='wordcloud-bench-')
+    # Indexes were created above, keep the warm-up threads out of the timings
+    warmup.enabled = False
+
+    inputs = pick_inputs(data)
+    results = {}
+    for name, backend, fn in utils_benchmarks(inputs) + callback_benchmarks(inputs):
+        if args.only and args.only not in name:
+            continue
+        if backend in skipped:
+            results[name] = {'skipped': skipped[backend]}
+            continue
+        try:
+            results[name] = measure(fn, args.repeat, args.warmup)
+            print(f"{name:<50}{results[name]['median_ms']:>10.2f} ms")
+        except Exception as e:
+            results[name] = {'error': f"{type(e).__name__}: {e}"}
+            print(f"{name:<50}     error  {results[name]['error'][:100]}")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'scale': scale,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'mongodb': args.mongo_uri or 'mongomock',
+            'neo4j': 'stub',
+            'shared_cache': args.shared_cache,
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', f"{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {output}")
+    wordcloud_utils.shutdown_renderer()
+
+
+if __name__ == '__main__':
+    main()
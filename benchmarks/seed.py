@@ -0,0 +1,117 @@
+# Synthetic AcademicWorld-shaped dataset for the benchmark suite, and
+# loaders for the MySQL / MongoDB stand-ins it is benchmarked against.
+import random
+
+import mysql.connector
+
+FIRST_NAMES = ['Alice', 'Bob', 'Carol', 'David', 'Erin', 'Frank', 'Grace', 'Heidi', 'Ivan', 'Judy',
+               'Karl', 'Laura', 'Mallory', 'Niaj', 'Olivia', "Patrick", 'Quinn', 'Rupert', 'Sybil', 'Trent']
+LAST_NAMES = ['Smith', 'Chen', 'Garcia', "O'Neil", 'Kumar', 'Novak', 'Ito', 'Muller', 'Rossi', 'Silva',
+              'Kim', 'Nguyen', 'Brown', 'Cohen', 'Singh', 'Park', 'Lopez', 'Wang', 'Dubois', 'Jensen']
+TOPIC_WORDS = ['learning', 'deep', 'network', 'graph', 'database', 'query', 'optimization', 'distributed',
+               'systems', 'security', 'vision', 'language', 'model', 'data', 'mining', 'retrieval',
+               'robotics', 'quantum', 'compiler', 'parallel', 'cloud', 'privacy', 'inference', 'search']
+POSITIONS = ['Assistant Professor', 'Associate Professor', 'Professor', 'Lecturer']
+VENUES = ['SIGMOD', 'VLDB', 'NeurIPS', 'ICML', 'CVPR', 'ACL', 'KDD', 'OSDI', 'CCS', 'ICSE']
+
+SCALES = {
+    'small': {'universities': 10, 'faculty': 500, 'publications': 5000, 'keywords': 300},
+    'medium': {'universities': 50, 'faculty': 5000, 'publications': 50000, 'keywords': 2000},
+    'large': {'universities': 150, 'faculty': 20000, 'publications': 300000, 'keywords': 10000},
+}
+
+
+def generate(universities, faculty, publications, keywords, seed=0):
+    rng = random.Random(seed)
+    data = {'universities': [], 'faculty': [], 'publications': [], 'keywords': [],
+            'faculty_publication': [], 'publication_keyword': []}
+
+    for i in range(1, universities + 1):
+        data['universities'].append({'id': i, 'name': f"University of {rng.choice(TOPIC_WORDS).title()} {i}"})
+    for i in range(1, keywords + 1):
+        data['keywords'].append({'id': i, 'name': f"{rng.choice(TOPIC_WORDS)} {rng.choice(TOPIC_WORDS)} {i}"})
+    for i in range(1, faculty + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        data['faculty'].append({
+            'id': i, 'name': name, 'position': rng.choice(POSITIONS),
+            'research_interest': ', '.join(rng.sample(TOPIC_WORDS, 3)),
+            'email': f"faculty{i}@example.edu", 'phone': f"555-{i:04d}",
+            'photo_url': f"https://example.edu/photos/{i}.jpg",
+            'university_id': rng.randint(1, universities),
+        })
+    for i in range(1, publications + 1):
+        data['publications'].append({
+            'id': i, 'title': ' '.join(rng.sample(TOPIC_WORDS, rng.randint(4, 8))).capitalize() + f" {i}",
+            'venue': rng.choice(VENUES), 'year': rng.randint(1990, 2023),
+            'num_citations': int(rng.paretovariate(1.2)) - 1,
+        })
+        for faculty_id in rng.sample(range(1, faculty + 1), min(faculty, rng.randint(1, 4))):
+            data['faculty_publication'].append((faculty_id, i))
+        for keyword_id in rng.sample(range(1, keywords + 1), min(keywords, rng.randint(3, 8))):
+            data['publication_keyword'].append((i, keyword_id, round(rng.random(), 4)))
+    return data
+
+
+MYSQL_SCHEMA = [
+    "CREATE TABLE university (id INT PRIMARY KEY, name VARCHAR(512), photo_url VARCHAR(512))",
+    """CREATE TABLE faculty (id INT PRIMARY KEY, name VARCHAR(512), position VARCHAR(512),
+        research_interest VARCHAR(512), email VARCHAR(512), phone VARCHAR(512),
+        photo_url VARCHAR(512), university_id INT)""",
+    "CREATE TABLE publication (id INT PRIMARY KEY, title VARCHAR(512), venue VARCHAR(512), year INT, num_citations INT)",
+    "CREATE TABLE keyword (id INT PRIMARY KEY, name VARCHAR(512))",
+    "CREATE TABLE faculty_publication (faculty_id INT, publication_id INT, PRIMARY KEY (faculty_id, publication_id))",
+    "CREATE TABLE publication_keyword (publication_id INT, keyword_id INT, score FLOAT, PRIMARY KEY (publication_id, keyword_id))",
+]
+
+
+def _insert(cursor, table, columns, rows, batch_size=5000):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(sql, rows[start:start + batch_size])
+
+
+# (Re)create the benchmark database on the MySQL server configured in mysql_utils
+def seed_mysql(data, host, user, password, database):
+    conn = mysql.connector.connect(host=host, user=user, password=password)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}`")
+    cursor.execute(f"USE `{database}`")
+    for statement in MYSQL_SCHEMA:
+        cursor.execute(statement)
+    _insert(cursor, 'university', ['id', 'name'], [(u['id'], u['name']) for u in data['universities']])
+    _insert(cursor, 'faculty', ['id', 'name', 'position', 'research_interest', 'email', 'phone', 'photo_url', 'university_id'],
+            [(f['id'], f['name'], f['position'], f['research_interest'], f['email'], f['phone'], f['photo_url'], f['university_id'])
+             for f in data['faculty']])
+    _insert(cursor, 'publication', ['id', 'title', 'venue', 'year', 'num_citations'],
+            [(p['id'], p['title'], p['venue'], p['year'], p['num_citations']) for p in data['publications']])
+    _insert(cursor, 'keyword', ['id', 'name'], [(k['id'], k['name']) for k in data['keywords']])
+    _insert(cursor, 'faculty_publication', ['faculty_id', 'publication_id'], data['faculty_publication'])
+    _insert(cursor, 'publication_keyword', ['publication_id', 'keyword_id', 'score'], data['publication_keyword'])
+    conn.commit()
+    conn.close()
+
+
+# Load the dataset into a MongoDB database (a real mongod or mongomock)
+def seed_mongo(db, data):
+    universities = {u['id']: u for u in data['universities']}
+    keywords = {k['id']: k['name'] for k in data['keywords']}
+    publications_of = {}
+    for faculty_id, publication_id in data['faculty_publication']:
+        publications_of.setdefault(faculty_id, []).append(publication_id)
+    keywords_of = {}
+    for publication_id, keyword_id, score in data['publication_keyword']:
+        keywords_of.setdefault(publication_id, []).append({'name': keywords[keyword_id], 'score': score})
+
+    for name in ('faculty', 'publications'):
+        db[name].drop()
+    db.faculty.insert_many([{
+        'id': f['id'], 'name': f['name'], 'position': f['position'], 'email': f['email'], 'phone': f['phone'],
+        'photoUrl': f['photo_url'], 'researchInterest': f['research_interest'],
+        'affiliation': {'id': f['university_id'], 'name': universities[f['university_id']]['name']},
+        'publications': publications_of.get(f['id'], []),
+    } for f in data['faculty']])
+    db.publications.insert_many([{
+        'id': p['id'], 'title': p['title'], 'venue': p['venue'], 'year': p['year'],
+        'numCitations': p['num_citations'], 'keywords': keywords_of.get(p['id'], []),
+    } for p in data['publications']])
@@ -0,0 +1,116 @@
+# In-memory stand-in for the Neo4j driver used by neo4j_utils. It answers the
+# read queries the dashboard issues (matched by their text in neo4j_utils)
+# from a Python graph built from the synthetic dataset.
+from collections import defaultdict
+
+import neo4j_utils
+
+
+class Graph:
+    def __init__(self, data):
+        universities = {u['id']: u['name'] for u in data['universities']}
+        years = {p['id']: p['year'] for p in data['publications']}
+        self.faculty = {f['id']: {'id': f['id'], 'name': f['name'], 'photoUrl': f['photo_url']} for f in data['faculty']}
+        self.affiliation = {f['id']: universities[f['university_id']] for f in data['faculty']}
+        self.institutes = list(universities.values())
+        authors = defaultdict(list)
+        for faculty_id, publication_id in data['faculty_publication']:
+            authors[publication_id].append(faculty_id)
+        # Equivalent of the materialized COLLABORATES_WITH edges
+        self.collaborations = defaultdict(dict)
+        for publication_id, faculty_ids in authors.items():
+            for a in faculty_ids:
+                for b in faculty_ids:
+                    if a != b:
+                        edge = self.collaborations[a].setdefault(b, {'count': 0, 'first_year': None, 'last_year': None})
+                        edge['count'] += 1
+                        year = years[publication_id]
+                        edge['first_year'] = year if edge['first_year'] is None else min(edge['first_year'], year)
+                        edge['last_year'] = year if edge['last_year'] is None else max(edge['last_year'], year)
+
+
+class Record(dict):
+    pass
+
+
+class Result:
+    def __init__(self, records):
+        self._records = [Record(r) for r in records]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def consume(self):
+        return None
+
+
+class Session:
+    def __init__(self, graph):
+        self.graph = graph
+        self.handlers = {
+            neo4j_utils.collaborations_built_query: self._collaborations_built,
+            neo4j_utils.collaboration_network_query: self._collaboration_network,
+            neo4j_utils.live_collaboration_network_query: self._collaboration_network,
+            neo4j_utils.institute_faculty_counts_query: self._institute_faculty_counts,
+            neo4j_utils.total_faculty_count_query: self._total_faculty_count,
+        }
+        for statement, fallback in neo4j_utils.neo4j_indexes:
+            self.handlers[statement] = self._no_op
+
+    def run(self, query, **params):
+        handler = self.handlers.get(query)
+        if handler is None:
+            raise NotImplementedError(f"Graph stub does not support query: {query.strip()[:80]}")
+        return Result(handler(**params))
+
+    def begin_transaction(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _no_op(self, **params):
+        return []
+
+    def _collaborations_built(self):
+        return [{'built': True}]
+
+    def _collaboration_network(self, faculty_id):
+        me = self.graph.faculty.get(faculty_id)
+        if me is None:
+            return []
+        return [{'id1': me['id'], 'faculty1': me['name'], 'photo1': me['photoUrl'],
+                 'id2': co, 'faculty2': self.graph.faculty[co]['name'], 'photo2': self.graph.faculty[co]['photoUrl'],
+                 'collaborations': edge['count']}
+                for co, edge in self.graph.collaborations[faculty_id].items()]
+
+    def _institute_faculty_counts(self):
+        counts = defaultdict(int)
+        for university in self.graph.affiliation.values():
+            counts[university] += 1
+        total = len(self.graph.faculty)
+        return [{'total_faculty_count': total, 'university': name, 'university_faculty_count': counts[name]}
+                for name in self.graph.institutes]
+
+    def _total_faculty_count(self):
+        return [{'total_faculty_count': len(self.graph.faculty)}]
+
+
+class Driver:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def session(self, database=None):
+        return Session(self.graph)
+
+    def close(self):
+        pass
@@ -0,0 +1,231 @@
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# In-process cache for results that rarely change. Entries expire after
+# `ttl` seconds, at most `maxsize` argument combinations are kept (least
+# recently used first out). The wrapped function gets:
+#   fn.invalidate()  drop every cached entry
+#   fn.warm(*args)   compute and cache the entry for args ahead of time
+def ttl_cache(ttl, maxsize=128):
+    def decorator(fn):
+        entries = OrderedDict()  # key -> (expires_at, value)
+        lock = threading.Lock()
+
+        def make_key(args, kwargs):
+            return args, tuple(sorted(kwargs.items()))
+
+        def store(key, value):
+            with lock:
+                entries[key] = (time.monotonic() + ttl, value)
+                entries.move_to_end(key)
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            with lock:
+                entry = entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    entries.move_to_end(key)
+                    return entry[1]
+            value = fn(*args, **kwargs)
+            store(key, value)
+            return value
+
+        def invalidate():
+            with lock:
+                entries.clear()
+
+        def warm(*args, **kwargs):
+            value = fn(*args, **kwargs)
+            store(make_key(args, kwargs), value)
+            return value
+
+        wrapper.invalidate = invalidate
+        wrapper.warm = warm
+        return wrapper
+    return decorator
+
+
+# Cache shared by every process on the machine (server workers, refresh.py),
+# stored in an SQLite file. Values are pickled, so functions must return
+# picklable data. Disabled (functions are called directly) with
+# DASHBOARD_CACHE_PATH=off. The default file is next to this module rather
+# than in the working directory, so processes started from anywhere share it
+shared_cache_path = os.environ.get('DASHBOARD_CACHE_PATH', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '.cache', 'query_cache.sqlite3'))
+shared_cache_timeout = 5  # seconds to wait for a lock held by another process
+
+logger = logging.getLogger(__name__)
+# Process in which the shared cache was turned off after a failed invalidation
+_disabled_pid = None
+
+_local = threading.local()
+_stats = {}  # function name -> {"hits": n, "misses": n}, for this process
+_stats_lock = threading.Lock()
+
+_schema = [
+    """CREATE TABLE IF NOT EXISTS entries (
+        function TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value BLOB NOT NULL,
+        expires_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (function, key)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (function, last_used)",
+    "CREATE TABLE IF NOT EXISTS generations (function TEXT PRIMARY KEY, generation INTEGER NOT NULL)",
+]
+
+# One SQLite connection per thread and process
+def _connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid():
+        directory = os.path.dirname(shared_cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(shared_cache_path, timeout=shared_cache_timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _schema:
+            conn.execute(statement)
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+def _shared_cache_enabled():
+    return shared_cache_path != 'off' and _disabled_pid != os.getpid()
+
+def _count(name, result):
+    with _stats_lock:
+        _stats.setdefault(name, {'hits': 0, 'misses': 0})[result] += 1
+
+# Hits and misses of each shared_cache function in this process
+def cache_stats():
+    with _stats_lock:
+        return {name: dict(counts) for name, counts in _stats.items()}
+
+# Arguments normalized so that equivalent calls share an entry: positional or
+# keyword, defaults filled in, lists/tuples/sets and dict ordering unified
+def _normalize(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_normalize(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _normalize(item)) for key, item in value.items()))
+    return value
+
+# LRU + TTL cache of a function's results shared across processes. Entries
+# expire after `ttl` seconds and at most `maxsize` argument combinations are
+# kept (least recently used first out). The wrapped function gets:
+#   fn.invalidate()  drop every cached entry, in every process
+#   fn.warm(*args)   compute and cache the entry for args ahead of time
+# A result computed while invalidate() runs elsewhere is not stored, so a
+# write followed by invalidate() is never hidden by a stale entry.
+def shared_cache(ttl, maxsize=1024):
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        signature = inspect.signature(fn)
+
+        def make_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            normalized = tuple((arg, _normalize(value)) for arg, value in bound.arguments.items())
+            return hashlib.sha1(repr(normalized).encode()).hexdigest()
+
+        def generation(conn):
+            row = conn.execute("SELECT generation FROM generations WHERE function = ?", (name,)).fetchone()
+            return row[0] if row else 0
+
+        def store(conn, key, value, expected_generation):
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if generation(conn) == expected_generation:
+                    conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                                 (name, key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + ttl, now))
+                    conn.execute("""
+                        DELETE FROM entries WHERE function = ? AND key IN (
+                            SELECT key FROM entries WHERE function = ? ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                        )""", (name, name, maxsize))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        def compute(key, args, kwargs):
+            try:
+                conn = _connection()
+                expected_generation = generation(conn)
+            except sqlite3.Error:
+                return fn(*args, **kwargs)
+            value = fn(*args, **kwargs)
+            try:
+                store(conn, key, value, expected_generation)
+            except (sqlite3.Error, pickle.PicklingError, TypeError):
+                pass
+            return value
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _shared_cache_enabled():
+                return fn(*args, **kwargs)
+            key = make_key(args, kwargs)
+            try:
+                conn = _connection()
+                row = conn.execute("SELECT value, expires_at, last_used FROM entries WHERE function = ? AND key = ?",
+                                   (name, key)).fetchone()
+                now = time.time()
+                if row is not None and row[1] > now:
+                    value = pickle.loads(row[0])
+                    # Recency is only tracked to the second, which saves a write on most hits
+                    if now - row[2] > 1:
+                        conn.execute("UPDATE entries SET last_used = ? WHERE function = ? AND key = ?", (now, name, key))
+                    _count(name, 'hits')
+                    return value
+            except (sqlite3.Error, pickle.UnpicklingError):
+                pass
+            _count(name, 'misses')
+            return compute(key, args, kwargs)
+
+        # Called after a write has been committed, so a cache failure must not
+        # turn it into an error. Entries may be stale then: the cache is turned
+        # off in this process and the failure is logged
+        def invalidate():
+            global _disabled_pid
+            if not _shared_cache_enabled():
+                return
+            try:
+                conn = _connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute("INSERT INTO generations VALUES (?, 1) "
+                                 "ON CONFLICT (function) DO UPDATE SET generation = generation + 1", (name,))
+                    conn.execute("DELETE FROM entries WHERE function = ?", (name,))
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                logger.error("could not invalidate the shared cache of %s, turning the cache off in this process: %s", name, e)
+                _disabled_pid = os.getpid()
+
+        def warm(*args, **kwargs):
+            if not _shared_cache_enabled():
+                return fn(*args, **kwargs)
+            return compute(make_key(args, kwargs), args, kwargs)
+
+        wrapper.invalidate = invalidate
+        wrapper.warm = warm
+        return wrapper
+    return decorator
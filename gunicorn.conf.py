@@ -0,0 +1,32 @@
+# gunicorn settings for serving the dashboard: gunicorn -c gunicorn.conf.py
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:application'
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+
+# Worker processes (default 2 per core + 1) and threads per worker. Callbacks
+# mostly wait on the databases, so threads let a worker overlap them
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('DASHBOARD_THREADS', 4))
+worker_class = 'gthread'
+
+# Import the app once in the master and fork it, workers start faster and share memory
+preload_app = True
+
+# The faculty insight panel waits up to services.insight_deadline seconds
+timeout = int(os.environ.get('DASHBOARD_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Restart workers now and then to bound memory growth
+max_requests = int(os.environ.get('DASHBOARD_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    import wsgi
+    wsgi.after_fork()
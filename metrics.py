@@ -0,0 +1,174 @@
+import functools
+import inspect
+import os
+import threading
+import time
+
+import cache_utils
+
+# Prometheus-style metrics for the database utilities and the Dash callbacks,
+# served as text on /metrics. Turned on with DASHBOARD_METRICS=1; when off
+# nothing is wrapped and no route is added, so there is no overhead at all.
+#
+# Metrics are kept per process: with several server workers, each one
+# reports its own counters.
+enabled = os.environ.get('DASHBOARD_METRICS', '') not in ('', '0', 'false', 'False')
+
+# Public functions of the backend modules that are plumbing rather than
+# queries: connections, pools, EXPLAIN and pure helpers. Every other public
+# function is instrumented, so a new query function is measured without being
+# listed here. A name that no longer exists is reported when instrumenting
+plumbing_functions = {
+    'mysql': ['explain_statement', 'get_pool', 'reset_pool', 'pool_stats', 'get_connection'],
+    'mongodb': ['explain_command', 'get_client', 'close_client', 'get_database',
+                'invalidate_affiliation_cache', 'normalize_school_name'],
+    'neo4j': ['get_driver', 'close_driver'],
+}
+
+# Upper bounds (seconds) of the latency histogram buckets
+duration_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_lock = threading.Lock()
+_durations = {}  # (backend, function) -> [bucket counts..., +Inf count, sum]
+_in_flight = {}  # (backend, function) -> calls currently running
+_errors = {}     # (backend, function, exception type) -> count
+_rows = {}       # (backend, function) -> rows returned in total
+
+
+# Number of rows in a query result: lists of rows and the {"rows": [...]}
+# pages of the search functions. Other results (tuples, dicts, counts) have none
+def count_rows(result):
+    if isinstance(result, dict) and isinstance(result.get('rows'), list):
+        return len(result['rows'])
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+def _observe(key, seconds, rows):
+    with _lock:
+        histogram = _durations.get(key)
+        if histogram is None:
+            histogram = _durations[key] = [0] * (len(duration_buckets) + 1) + [0.0]
+        for i, bound in enumerate(duration_buckets):
+            if seconds <= bound:
+                histogram[i] += 1
+        histogram[-2] += 1
+        histogram[-1] += seconds
+        if rows is not None:
+            _rows[key] = _rows.get(key, 0) + rows
+
+# Wrap fn so every call records its duration, in-flight count, errors and
+# rows returned under (backend, name). Attributes of fn such as the
+# invalidate()/warm() of cached functions are kept on the wrapper.
+def instrument(fn, backend, name=None):
+    if getattr(fn, '__metrics_key__', None):
+        return fn
+    key = (backend, name or fn.__name__)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _lock:
+            _in_flight[key] = _in_flight.get(key, 0) + 1
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            with _lock:
+                error_key = key + (type(e).__name__,)
+                _errors[error_key] = _errors.get(error_key, 0) + 1
+            _observe(key, time.perf_counter() - start, None)
+            raise
+        finally:
+            with _lock:
+                _in_flight[key] -= 1
+        _observe(key, time.perf_counter() - start, count_rows(result))
+        return result
+
+    wrapper.__metrics_key__ = key
+    return wrapper
+
+# Replace every public function defined in module, except the plumbing ones,
+# by its instrumented version. Callers look functions up on the module at call
+# time, so this also covers calls between functions of the same module.
+def instrument_module(module, backend):
+    functions = {name: fn for name, fn in vars(module).items()
+                 if not name.startswith('_') and inspect.isfunction(fn) and fn.__module__ == module.__name__}
+    unknown = [name for name in plumbing_functions[backend] if name not in functions]
+    if unknown:
+        raise ValueError(f"metrics.plumbing_functions['{backend}'] lists {', '.join(unknown)}, "
+                         f"which {module.__name__} does not define")
+    for name, fn in functions.items():
+        if name not in plumbing_functions[backend]:
+            setattr(module, name, instrument(fn, backend, name))
+
+# Wrap every registered server-side callback of a Dash app, run after the
+# last callback has been registered
+def instrument_callbacks(dash_app):
+    for entry in dash_app.callback_map.values():
+        if 'callback' in entry:
+            entry['callback'] = instrument(entry['callback'], 'callback')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+# Current metrics in the Prometheus text exposition format
+def render():
+    with _lock:
+        durations = {key: list(value) for key, value in _durations.items()}
+        in_flight = dict(_in_flight)
+        errors = dict(_errors)
+        rows = dict(_rows)
+
+    lines = [
+        '# HELP dashboard_call_duration_seconds Duration of database utility functions and Dash callbacks.',
+        '# TYPE dashboard_call_duration_seconds histogram',
+    ]
+    for (backend, function), histogram in sorted(durations.items()):
+        for bound, count in zip(duration_buckets, histogram):
+            lines.append(f'dashboard_call_duration_seconds_bucket{_labels(backend=backend, function=function, le=bound)} {count}')
+        lines.append(f'dashboard_call_duration_seconds_bucket{_labels(backend=backend, function=function, le="+Inf")} {histogram[-2]}')
+        lines.append(f'dashboard_call_duration_seconds_sum{_labels(backend=backend, function=function)} {histogram[-1]:.6f}')
+        lines.append(f'dashboard_call_duration_seconds_count{_labels(backend=backend, function=function)} {histogram[-2]}')
+
+    lines += [
+        '# HELP dashboard_calls_in_flight Calls currently running.',
+        '# TYPE dashboard_calls_in_flight gauge',
+    ]
+    for (backend, function), count in sorted(in_flight.items()):
+        lines.append(f'dashboard_calls_in_flight{_labels(backend=backend, function=function)} {count}')
+
+    lines += [
+        '# HELP dashboard_call_errors_total Calls that raised, by exception type.',
+        '# TYPE dashboard_call_errors_total counter',
+    ]
+    for (backend, function, error), count in sorted(errors.items()):
+        lines.append(f'dashboard_call_errors_total{_labels(backend=backend, function=function, error=error)} {count}')
+
+    lines += [
+        '# HELP dashboard_rows_returned_total Rows returned by calls with list results.',
+        '# TYPE dashboard_rows_returned_total counter',
+    ]
+    for (backend, function), count in sorted(rows.items()):
+        lines.append(f'dashboard_rows_returned_total{_labels(backend=backend, function=function)} {count}')
+
+    lines += [
+        '# HELP dashboard_cache_requests_total Lookups of the shared result cache, by result.',
+        '# TYPE dashboard_cache_requests_total counter',
+    ]
+    for function, counts in sorted(cache_utils.cache_stats().items()):
+        lines.append(f'dashboard_cache_requests_total{_labels(function=function, result="hit")} {counts["hits"]}')
+        lines.append(f'dashboard_cache_requests_total{_labels(function=function, result="miss")} {counts["misses"]}')
+    return '\n'.join(lines) + '\n'
+
+# Drop the recorded histograms and counters (in-flight gauges are live values and stay)
+def reset():
+    with _lock:
+        _durations.clear()
+        _errors.clear()
+        _rows.clear()
+
+# Add the /metrics route to a Flask server
+def register_route(server, path='/metrics'):
+    def metrics_endpoint():
+        return render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    server.add_url_rule(path, 'metrics', metrics_endpoint)
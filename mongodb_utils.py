@@ -1,9 +1,101 @@
-from pymongo import MongoClient
+import atexit
+import difflib
+import functools
+import os
+import re
+import threading
+
+from pymongo import MongoClient, monitoring
+from pymongo.errors import OperationFailure
+
+import cache_utils
+import query_deadline
+import querylog
+
+uri = "mongodb://localhost:27017/"
+database = 'academicworld'
+
+# Client settings: connection pool bounds, how long to wait for a reachable
+# server / a socket read, and the server-side time limit of every find/aggregate
+max_pool_size = 50
+min_pool_size = 0
+server_selection_timeout_ms = 5000
+connect_timeout_ms = 5000
+socket_timeout_ms = 10000
+max_time_ms = 5000
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+# maxTimeMS of a query: max_time_ms, or less when the caller's query_deadline is nearer
+def _max_time_ms():
+    remaining_ms = query_deadline.remaining_ms()
+    return max_time_ms if remaining_ms is None else min(max_time_ms, remaining_ms)
+
+# Commands whose plan the explain command can capture
+explainable_commands = ('aggregate', 'find', 'count', 'distinct', 'delete', 'update', 'findAndModify')
+
+# Command fields set by the driver per request, not accepted inside explain
+_driver_fields = ('lsid', 'txnNumber', 'readConcern', 'writeConcern', 'maxTimeMS')
+
+# queryPlanner explain of a command, which does not run it (nor the $out/$merge of a pipeline)
+def explain_command(database_name, command):
+    command = {key: value for key, value in command.items() if not key.startswith('$') and key not in _driver_fields}
+    return get_client()[database_name].command({'explain': command, 'verbosity': 'queryPlanner'})
+
+# Times every command of the client, commands slower than querylog.slow_query_ms
+# are logged with their explain output
+class SlowCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self._started = {}
+
+    def started(self, event):
+        if event.command_name in explainable_commands:
+            self._started[event.request_id] = dict(event.command)
+
+    def succeeded(self, event):
+        command = self._started.pop(event.request_id, None)
+        seconds = event.duration_micros / 1e6
+        if command is not None and querylog.is_slow(seconds):
+            query = {key: value for key, value in command.items() if not key.startswith('$') and key != 'lsid'}
+            querylog.report('mongodb', query, None, seconds, functools.partial(explain_command, event.database_name, command))
+
+    def failed(self, event):
+        self._started.pop(event.request_id, None)
+
+# One MongoClient per process, created on first use. MongoClient is not
+# fork-safe, so a forked child creates its own instead of reusing the parent's
+def get_client():
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = MongoClient(
+                    uri,
+                    maxPoolSize=max_pool_size,
+                    minPoolSize=min_pool_size,
+                    serverSelectionTimeoutMS=server_selection_timeout_ms,
+                    connectTimeoutMS=connect_timeout_ms,
+                    socketTimeoutMS=socket_timeout_ms,
+                    event_listeners=[SlowCommandListener()] if querylog.slow_query_ms is not None else [],
+                )
+                _client_pid = os.getpid()
+    return _client
+
+# Close the client of this process (monitor threads and pooled sockets)
+def close_client():
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+atexit.register(close_client)
 
 def get_database():
-    client = MongoClient("mongodb://localhost:27017/")
-    db = client['academicworld']
-    return db
+    return get_client()[database]
 
 #Indexing, Database Techniques R13
 def create_indexes():
@@ -12,52 +104,130 @@ def create_indexes():
     db.faculty.create_index([("publications", 1)])
     db.publications.create_index([("id", 1)])
     db.publications.create_index([("keywords.name", 1)])
+    db[krc_collection].create_index([("affiliation", 1), ("keyword", 1), ("KRC", -1)])
+    db[krc_collection].create_index([("faculty_id", 1)])
+    db[keyword_rollup_collection].create_index([("school", 1), ("count", -1)])
 
 # will connect to searching bar
 def search_collection(collection_name, query):
     db = get_database()
     collection = db[collection_name]
-    return list(collection.find(query))
+    return list(collection.find(query).max_time_ms(_max_time_ms()))
 
 # shoe faculty info
 def get_faculty(limit=5):
     db = get_database()
     collection = db['faculty']
-    return list(collection.find().limit(limit))
+    return list(collection.find().limit(limit).max_time_ms(_max_time_ms()))
 
 # Get faculty count
 def get_faculty_cnt():
     db = get_database()
     collection = db['faculty']
-    return collection.count_documents({})
+    return collection.count_documents({}, maxTimeMS=_max_time_ms())
 
-# Get affilication count
-def get_affiliation_count():
+# Affiliations almost never change, so their summary is cached in-process
+affiliation_cache_ttl = 3600
+
+# Get affiliation count and all affiliations sorted by name in a single
+# pass over faculty: {"count": n, "affiliations": [{"name": ...}]}
+@cache_utils.ttl_cache(ttl=affiliation_cache_ttl)
+def get_affiliation_summary():
     db = get_database()
     collection = db['faculty']
     pipeline = [
-        { "$group": { "_id": "$affiliation.id" } },
-        { "$count": "count" }
+        { "$group": { "_id": "$affiliation.id", "name": { "$first": "$affiliation.name" } } },
+        { "$facet": {
+            "count": [ { "$count": "count" } ],
+            "affiliations": [ { "$sort": { "name": 1 } }, { "$project": { "_id": 0, "name": 1 } } ] } }
     ]
-    result = list(collection.aggregate(pipeline))
-    if result:
-        return result[0]['count']
-    else:
-        return 0
+    result = list(collection.aggregate(pipeline, maxTimeMS=_max_time_ms()))
+    facets = result[0] if result else {}
+    return {
+        "count": facets["count"][0]["count"] if facets.get("count") else 0,
+        "affiliations": facets.get("affiliations", [])
+    }
+
+# Drop the cached summary, e.g. after faculty affiliations were changed
+def invalidate_affiliation_cache():
+    get_affiliation_summary.invalidate()
+
+# Load the summary into the cache ahead of the first request
+def warm_affiliation_cache():
+    get_affiliation_summary.warm()
+
+# Get affilication count
+def get_affiliation_count():
+    return get_affiliation_summary()["count"]
     
 # Get all affilications  
 def get_all_affiliations():
+    return get_affiliation_summary()["affiliations"]
+
+# Materialized KRC (keyword relevant citation) per (affiliation, keyword, faculty).
+# Built by refresh_krc() and read by calculate_krc()
+krc_collection = 'krc'
+
+def _krc_pipeline(faculty_match):
+    return [
+        { "$match": faculty_match },
+        { "$lookup": {
+            "from": "publications",
+            "localField": "publications",
+            "foreignField": "id",
+            "as": "pub_data" } },
+        { "$unwind": "$pub_data" },
+        { "$unwind": "$pub_data.keywords" },
+        { "$group": {
+            "_id": { "affiliation": "$affiliation.name", "keyword": "$pub_data.keywords.name", "faculty_id": "$_id" },
+            "faculty": { "$first": "$name" },
+            "KRC": { "$sum": { "$multiply": ["$pub_data.keywords.score", "$pub_data.numCitations"] } } } },
+        { "$project": {
+            "_id": 1,
+            "affiliation": "$_id.affiliation",
+            "keyword": "$_id.keyword",
+            "faculty_id": "$_id.faculty_id",
+            "faculty": 1,
+            "KRC": 1 } }
+    ]
+
+# Rebuild the KRC collection. Without arguments the whole collection is
+# recomputed and swapped in atomically ($out keeps the existing indexes);
+# with faculty ids only the rows of those faculty are replaced
+def refresh_krc(faculty_ids=None):
     db = get_database()
-    collection = db['faculty']
-    pipeline = [
-        { "$group": { "_id": "$affiliation.id", "name": { "$first": "$affiliation.name" } } },
-        { "$project": { "_id": 0, "name": 1 } }
+    if faculty_ids is None:
+        pipeline = _krc_pipeline({}) + [{ "$out": krc_collection }]
+        db.faculty.aggregate(pipeline, allowDiskUse=True)
+        calculate_krc.invalidate()
+        return
+    faculty_ids = list(faculty_ids)
+    if not faculty_ids:
+        return
+    db[krc_collection].delete_many({ "faculty_id": { "$in": faculty_ids } })
+    pipeline = _krc_pipeline({ "_id": { "$in": faculty_ids } }) + [
+        { "$merge": { "into": krc_collection, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert" } }
     ]
-    result = list(collection.aggregate(pipeline))
-    return result
+    db.faculty.aggregate(pipeline, allowDiskUse=True)
+    calculate_krc.invalidate()
 
-# Calculate KRC of a professor
-def calculate_krc(affiliation_name, keyword):
+# Faculty whose materialized rows depend on the given publications
+def faculty_ids_for_publications(publication_ids):
+    db = get_database()
+    cursor = db.faculty.find({ "publications": { "$in": list(publication_ids) } }, { "_id": 1 })
+    return [doc["_id"] for doc in cursor.max_time_ms(_max_time_ms())]
+
+# Incremental refresh after publications were added, edited or removed
+def refresh_krc_for_publications(publication_ids):
+    refresh_krc(faculty_ids_for_publications(publication_ids))
+
+# calculate_krc and top_keywords_by_school results are cached across processes
+# (cache_utils.shared_cache) and invalidated by the refresh jobs
+summary_cache_ttl = 3600
+
+# Calculate KRC of a professor, on the fly from faculty and publications.
+# Used until refresh_krc() has built the materialized collection
+def _calculate_krc_live(affiliation_name, keyword):
     db = get_database()
     pipeline = [
         { "$match": { "affiliation.name": affiliation_name } },
@@ -74,11 +244,228 @@ def calculate_krc(affiliation_name, keyword):
         { "$limit": 10 },
         { "$project": { "_id": 1, "KRC": 1} }
     ]
-    result = list(db.faculty.aggregate(pipeline))
+    result = list(db.faculty.aggregate(pipeline, maxTimeMS=_max_time_ms()))
     return result
 
-# Get top keywords in a school
-def top_keywords_by_school(school_name):
+_krc_materialized = False
+
+# Calculate KRC of a professor: top 10 faculty of a school for a keyword,
+# read from the (affiliation, keyword, KRC desc) index of the KRC collection
+@cache_utils.shared_cache(ttl=summary_cache_ttl)
+def calculate_krc(affiliation_name, keyword):
+    global _krc_materialized
+    db = get_database()
+    if not _krc_materialized:
+        if db[krc_collection].estimated_document_count(maxTimeMS=_max_time_ms()) == 0:
+            return _calculate_krc_live(affiliation_name, keyword)
+        _krc_materialized = True
+    pipeline = [
+        { "$match": { "affiliation": affiliation_name, "keyword": keyword } },
+        { "$sort": { "KRC": -1 } },
+        { "$limit": 10 },
+        { "$project": { "_id": "$faculty", "KRC": 1 } }
+    ]
+    result = list(db[krc_collection].aggregate(pipeline, maxTimeMS=_max_time_ms()))
+    return result
+
+# Normalized school name used for lookups: lower case, punctuation and
+# repeated whitespace collapsed ("University of Illinois at Urbana-Champaign"
+# and "university of illinois at urbana champaign" are the same school)
+def normalize_school_name(name):
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', name.lower()).split())
+
+# Materialized keyword counts per school, built by refresh_keyword_rollups()
+keyword_rollup_collection = 'school_keywords'
+# School names keyed by their normalized form, used to resolve user input
+school_name_collection = 'school_names'
+
+def _keyword_rollup_pipeline(faculty_match):
+    return [
+        { "$match": faculty_match },
+        { "$lookup": {
+            "from": "publications",
+            "localField": "publications",
+            "foreignField": "id",
+            "as": "pub_data" } },
+        { "$unwind": "$pub_data" },
+        { "$unwind": "$pub_data.keywords" },
+        { "$group": {
+            "_id": { "school": "$affiliation.name", "keyword": "$pub_data.keywords.name" },
+            "count": { "$sum": 1 },
+            "score_sum": { "$sum": "$pub_data.keywords.score" } } },
+        { "$project": {
+            "_id": 1,
+            "school": "$_id.school",
+            "keyword": "$_id.keyword",
+            "count": 1,
+            "score_sum": 1 } }
+    ]
+
+# Rebuild the keyword rollups, of every school or only of the given ones
+def refresh_keyword_rollups(school_names=None):
+    db = get_database()
+    if school_names is None:
+        db.faculty.aggregate(_keyword_rollup_pipeline({}) + [{ "$out": keyword_rollup_collection }], allowDiskUse=True)
+        school_names = db.faculty.distinct("affiliation.name")
+    else:
+        school_names = list(school_names)
+        if not school_names:
+            return
+        db[keyword_rollup_collection].delete_many({ "school": { "$in": school_names } })
+        pipeline = _keyword_rollup_pipeline({ "affiliation.name": { "$in": school_names } }) + [
+            { "$merge": { "into": keyword_rollup_collection, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert" } }
+        ]
+        db.faculty.aggregate(pipeline, allowDiskUse=True)
+    for name in school_names:
+        if name:
+            db[school_name_collection].replace_one({ "_id": normalize_school_name(name) }, { "name": name }, upsert=True)
+    top_keywords_by_school.invalidate()
+
+# Incremental refresh after publications were added, edited or removed
+def refresh_keyword_rollups_for_publications(publication_ids):
+    db = get_database()
+    faculty_ids = faculty_ids_for_publications(publication_ids)
+    schools = db.faculty.distinct("affiliation.name", { "_id": { "$in": faculty_ids } })
+    refresh_keyword_rollups(schools)
+
+# Resume token of the change stream read by refresh_changed(), kept between runs
+refresh_state_collection = 'refresh_state'
+
+change_stream_pipeline = [{ "$match": { "ns.coll": { "$in": ["faculty", "publications"] } } }]
+
+# Raised by the server when a resume token is older than the oplog
+_change_stream_history_lost = 286
+
+def _change_stream(db, token=None):
+    return db.watch(change_stream_pipeline, resume_after=token, full_document="updateLookup",
+                    full_document_before_change="whenAvailable", max_await_time_ms=1000)
+
+# Faculty ids, publication ids and schools touched by the changes after token,
+# and the token to resume from next time. Returns None for the ids when an
+# event cannot be traced back to them (a drop, or a delete or key change
+# without pre-image); schools is None when only the rollups need a full rebuild
+def _read_changes(db, token):
+    faculty_ids, publication_ids, schools = set(), set(), set()
+    with _change_stream(db, token) as stream:
+        while True:
+            change = stream.try_next()
+            if change is None:
+                return (faculty_ids, publication_ids, schools), stream.resume_token
+            operation = change["operationType"]
+            if operation not in ('insert', 'update', 'replace', 'delete'):
+                return None, None
+            before, after = change.get("fullDocumentBeforeChange"), change.get("fullDocument")
+            documents = [doc for doc in (before, after) if doc]
+            updated = list(change.get("updateDescription", {}).get("updatedFields", {}))
+            updated += change.get("updateDescription", {}).get("removedFields", [])
+            if change["ns"]["coll"] == "faculty":
+                faculty_ids.add(change["documentKey"]["_id"])
+                if before is None and (operation in ('replace', 'delete')
+                                       or any(field.startswith('affiliation') for field in updated)):
+                    schools = None
+                elif schools is not None:
+                    schools.update(doc.get("affiliation", {}).get("name") for doc in documents)
+            else:
+                if before is None and (operation in ('replace', 'delete') or after is None or "id" in updated):
+                    return None, None
+                publication_ids.update(doc["id"] for doc in documents if "id" in doc)
+
+# Refresh the KRC and keyword rollups of whatever changed in faculty or
+# publications since the last run. The changes are read from a change stream
+# whose resume token is stored in refresh_state (the watermark), so the job
+# can run from cron and never misses a change. The first run, an expired token
+# or an event that cannot be traced back to faculty fall back to a full rebuild.
+# Change streams need a replica set; pre-images (see enable_pre_images) let
+# deletes be refreshed incrementally. Returns the number of faculty refreshed
+# (None for a full rebuild)
+def refresh_changed():
+    db = get_database()
+    state = db[refresh_state_collection].find_one({ "_id": "change_stream" })
+    changes = None
+    if state is not None:
+        try:
+            changes, token = _read_changes(db, state["token"])
+        except OperationFailure as error:
+            if error.code != _change_stream_history_lost:
+                raise
+    if changes is None:
+        # Taken before the rebuild, so changes made during it are read next time
+        with _change_stream(db) as stream:
+            token = stream.resume_token
+        refresh_krc()
+        refresh_keyword_rollups()
+        refreshed = None
+    else:
+        faculty_ids, publication_ids, schools = changes
+        if publication_ids:
+            faculty_ids.update(faculty_ids_for_publications(publication_ids))
+        refresh_krc(faculty_ids)
+        if schools is None:
+            refresh_keyword_rollups()
+        else:
+            schools.update(db.faculty.distinct("affiliation.name", { "_id": { "$in": list(faculty_ids) } }))
+            refresh_keyword_rollups(school for school in schools if school)
+        refreshed = len(faculty_ids)
+    db[refresh_state_collection].replace_one({ "_id": "change_stream" }, { "token": token }, upsert=True)
+    return refreshed
+
+# Record pre-images of faculty and publications (MongoDB 6.0+), so that
+# refresh_changed() can refresh deleted documents without a full rebuild.
+# Older servers reject the option; deletes then trigger full rebuilds
+def enable_pre_images():
+    db = get_database()
+    create_indexes()
+    for collection in ('faculty', 'publications'):
+        try:
+            db.command("collMod", collection, changeStreamPreAndPostImages={ "enabled": True })
+        except OperationFailure:
+            return
+
+# Resolve user input to a school name as stored in the database: exact
+# normalized match, then a normalized prefix match (both use the _id index),
+# then the closest spelling. Returns None if nothing is close enough
+def resolve_school_name(name):
+    db = get_database()
+    collection = db[school_name_collection]
+    normalized = normalize_school_name(name)
+    if not normalized:
+        return None
+    doc = collection.find_one({ "_id": normalized }, max_time_ms=_max_time_ms())
+    if doc is None:
+        doc = collection.find_one({ "_id": { "$regex": "^" + re.escape(normalized) } }, sort=[("_id", 1)], max_time_ms=_max_time_ms())
+    if doc is None:
+        names = {d["_id"]: d["name"] for d in collection.find({}, max_time_ms=_max_time_ms())}
+        return _closest_school_name(normalized, names)
+    return doc["name"]
+
+def _closest_school_name(normalized, names):
+    matches = difflib.get_close_matches(normalized, list(names), n=1, cutoff=0.8)
+    return names[matches[0]] if matches else None
+
+# resolve_school_name() for the live fallback, before the school_names
+# collection exists: the same matching against the distinct affiliation names
+# of faculty (read from the affiliation.name index), as {name as given: school}
+def _resolve_school_names_live(school_names):
+    db = get_database()
+    names = {}
+    for school in db.faculty.distinct("affiliation.name", maxTimeMS=_max_time_ms()):
+        if school:
+            names.setdefault(normalize_school_name(school), school)
+    resolved = {}
+    for name in school_names:
+        normalized = normalize_school_name(name)
+        if not normalized:
+            resolved[name] = None
+        elif normalized in names:
+            resolved[name] = names[normalized]
+        else:
+            prefixed = sorted(key for key in names if key.startswith(normalized))
+            resolved[name] = names[prefixed[0]] if prefixed else _closest_school_name(normalized, names)
+    return resolved
+
+# Get top keywords in a school, on the fly from faculty and publications.
+# Used until refresh_keyword_rollups() has built the rollups
+def _top_keywords_by_school_live(school_name, n=20):
     db = get_database()
     pipeline = [
         { "$match": { "affiliation.name": school_name } },
@@ -91,10 +478,48 @@ def top_keywords_by_school(school_name):
         { "$unwind": "$pub_data.keywords" },  
         { "$group": { 
             "_id": "$pub_data.keywords.name",
-            "count": { "$sum": 1 }
+            "count": { "$sum": 1 },
+            "score_sum": { "$sum": "$pub_data.keywords.score" }
         }},
         { "$sort": { "count": -1 } },
-        { "$limit": 20 }
+        { "$limit": n }
     ]
-    result = list(db.faculty.aggregate(pipeline))
-    return result
\ No newline at end of file
+    result = list(db.faculty.aggregate(pipeline, maxTimeMS=_max_time_ms()))
+    return result
+
+_keyword_rollups_materialized = False
+
+# Get the top n keywords of several schools in one round trip, as
+# {school name as given: [{"_id": keyword, "count", "score_sum"}]}.
+# Each school is an index-bounded sub-query combined with $unionWith
+def top_keywords_by_schools(school_names, n=20):
+    global _keyword_rollups_materialized
+    db = get_database()
+    if not _keyword_rollups_materialized:
+        if db[keyword_rollup_collection].estimated_document_count(maxTimeMS=_max_time_ms()) == 0:
+            resolved = _resolve_school_names_live(school_names)
+            return {name: _top_keywords_by_school_live(school, n) if school else [] for name, school in resolved.items()}
+        _keyword_rollups_materialized = True
+
+    resolved = {name: resolve_school_name(name) for name in school_names}
+    schools = [school for school in dict.fromkeys(resolved.values()) if school]
+    results = {school: [] for school in schools}
+    if schools:
+        def school_pipeline(school):
+            return [
+                { "$match": { "school": school } },
+                { "$sort": { "count": -1 } },
+                { "$limit": n },
+                { "$project": { "_id": "$keyword", "school": 1, "count": 1, "score_sum": 1 } }
+            ]
+        pipeline = school_pipeline(schools[0])
+        for school in schools[1:]:
+            pipeline.append({ "$unionWith": { "coll": keyword_rollup_collection, "pipeline": school_pipeline(school) } })
+        for doc in db[keyword_rollup_collection].aggregate(pipeline, maxTimeMS=_max_time_ms()):
+            results[doc.pop("school")].append(doc)
+    return {name: results.get(school, []) for name, school in resolved.items()}
+
+# Get top keywords in a school
+@cache_utils.shared_cache(ttl=summary_cache_ttl)
+def top_keywords_by_school(school_name, n=20):
+    return top_keywords_by_schools([school_name], n)[school_name]
@@ -0,0 +1,307 @@
+# Schema and index migrations for the MySQL database, and a check of the
+# query plans of mysql_utils. Migrations are run once per deploy (or by
+# refresh.py), never by the server workers, which only check that none is
+# pending (check(), run by the warm-up). Every step checks information_schema
+# first, so running it again is a no-op, and a run holds a server-side lock,
+# so concurrent runs wait for each other instead of racing.
+#
+#   python mysql_migrations.py           # apply the migrations
+#   python mysql_migrations.py --check   # apply them, then EXPLAIN every query of mysql_utils
+import re
+import sys
+
+import mysql.connector
+
+import cache_utils
+import mysql_utils
+
+# Tables maintained by the application, as (name, CREATE TABLE statement)
+tables = [
+    ('faculty_keyword_score', mysql_utils.faculty_keyword_score_schema.format(table='faculty_keyword_score')),
+    ('faculty_keyword_score_changes', mysql_utils.faculty_keyword_score_changes_schema),
+]
+
+# Triggers recording in faculty_keyword_score_changes the faculty whose keyword
+# scores a change affects, as (name, CREATE TRIGGER statement). Deletes of a
+# publication or faculty member are recorded before they happen: the rows a
+# foreign key cascade removes from faculty_publication fire no trigger
+_record_changes = "INSERT INTO faculty_keyword_score_changes (faculty_id) "
+_authors_of = "SELECT faculty_id FROM faculty_publication WHERE publication_id IN ({})"
+
+def _trigger(name, when, body):
+    return (name, f"CREATE TRIGGER {name} {when} FOR EACH ROW {_record_changes}{body}")
+
+triggers = [
+    _trigger('fks_faculty_publication_insert', "AFTER INSERT ON faculty_publication", "VALUES (NEW.faculty_id)"),
+    _trigger('fks_faculty_publication_update', "AFTER UPDATE ON faculty_publication", "VALUES (OLD.faculty_id), (NEW.faculty_id)"),
+    _trigger('fks_faculty_publication_delete', "AFTER DELETE ON faculty_publication", "VALUES (OLD.faculty_id)"),
+    _trigger('fks_publication_keyword_insert', "AFTER INSERT ON publication_keyword", _authors_of.format("NEW.publication_id")),
+    _trigger('fks_publication_keyword_update', "AFTER UPDATE ON publication_keyword",
+             _authors_of.format("OLD.publication_id, NEW.publication_id")),
+    _trigger('fks_publication_keyword_delete', "AFTER DELETE ON publication_keyword", _authors_of.format("OLD.publication_id")),
+    _trigger('fks_publication_delete', "BEFORE DELETE ON publication", _authors_of.format("OLD.id")),
+    _trigger('fks_faculty_delete', "BEFORE DELETE ON faculty", "VALUES (OLD.id)"),
+]
+
+# B-tree indexes as (table, index name, columns). An index is skipped when an
+# existing index already starts with the same columns, or when it starts with
+# the whole primary key: InnoDB stores the rows in primary key order, so such an
+# index would duplicate the table (it is dropped if an earlier run created it)
+indexes = [
+    # Faculty -> publications (top cited publications, keyword frequencies), covering
+    ('faculty_publication', 'idx_fp_faculty_publication', ['faculty_id', 'publication_id']),
+    # Publication -> authors (author hydration of search results, incremental refreshes), covering
+    ('faculty_publication', 'idx_fp_publication_faculty', ['publication_id', 'faculty_id']),
+    # Publication -> keywords with their score, covering (unless the primary key is (publication_id, keyword_id))
+    ('publication_keyword', 'idx_pk_publication_keyword_score', ['publication_id', 'keyword_id', 'score']),
+    # Year range filter, ordered by citations within a year
+    ('publication', 'idx_publication_year_citations', ['year', 'num_citations']),
+]
+
+# FULLTEXT indexes as (table, index name, column). They use the ngram parser so
+# any substring of at least mysql_utils.ngram_token_size characters can be found
+fulltext_indexes = [
+    ('faculty', 'ft_faculty_name', 'name'),
+    ('publication', 'ft_publication_title', 'title'),
+]
+
+# Indexes made redundant by the ones above, dropped if present
+obsolete_indexes = [
+    ('publication', 'idx_publication_year'),
+]
+
+# GET_LOCK lock held by a migration run, and seconds to wait for another run
+lock_name = 'academicworld.mysql_migrations'
+lock_timeout = 600
+
+
+def _index_columns(cursor, table):
+    cursor.execute("""
+        SELECT index_name, column_name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY index_name, seq_in_index
+    """, (table,))
+    columns = {}
+    for index_name, column_name in cursor.fetchall():
+        columns.setdefault(index_name, []).append(column_name.lower())
+    return columns
+
+def _table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+# Statements still to run to bring the database up to date. Only reads
+def _pending(cursor):
+    statements = []
+    for table, statement in tables:
+        if not _table_exists(cursor, table):
+            statements.append(statement)
+    for table, index_name, columns in indexes:
+        existing = _index_columns(cursor, table)
+        primary = existing.get('PRIMARY')
+        if primary and columns[:len(primary)] == primary:
+            if index_name in existing:
+                statements.append(f"ALTER TABLE {table} DROP INDEX {index_name}")
+            continue
+        covered = any(existing_columns[:len(columns)] == columns for existing_columns in existing.values())
+        if index_name not in existing and not covered:
+            statements.append(f"ALTER TABLE {table} ADD INDEX {index_name} ({', '.join(columns)})")
+    for table, index_name, column in fulltext_indexes:
+        if index_name not in _index_columns(cursor, table):
+            statements.append(f"ALTER TABLE {table} ADD FULLTEXT INDEX {index_name} ({column}) WITH PARSER ngram")
+    for table, index_name in obsolete_indexes:
+        if index_name in _index_columns(cursor, table):
+            statements.append(f"ALTER TABLE {table} DROP INDEX {index_name}")
+    cursor.execute("SELECT trigger_name FROM information_schema.triggers WHERE trigger_schema = DATABASE()")
+    existing_triggers = {row[0] for row in cursor.fetchall()}
+    for name, statement in triggers:
+        if name not in existing_triggers:
+            statements.append(statement)
+    return statements
+
+def pending():
+    conn = mysql_utils.get_connection()
+    try:
+        return _pending(conn.cursor())
+    finally:
+        conn.close()
+
+# Raise if the database is not up to date, for the warm-up: search relies on
+# the FULLTEXT indexes, so the app is not ready until the migrations have run
+def check():
+    statements = pending()
+    if statements:
+        raise RuntimeError(f"{len(statements)} MySQL migration(s) pending, run python mysql_migrations.py: "
+                           + "; ".join(statements))
+
+# Apply the pending migrations, returns the statements run
+def migrate():
+    # A connection of its own: the session setting below must not end up in
+    # the pool, and closing it ends the session, which releases the lock
+    conn = mysql.connector.connect(host=mysql_utils.host, user=mysql_utils.user,
+                                   password=mysql_utils.password, database=mysql_utils.database)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (lock_name, lock_timeout))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError(f"Another migration run held {lock_name} for more than {lock_timeout}s")
+        # With stopwords enabled the ngram parser drops every ngram containing one
+        # (e.g. any bigram with an 'a') while building a FULLTEXT index, which
+        # would make most substrings unsearchable
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        statements = _pending(cursor)
+        for statement in statements:
+            cursor.execute(statement)
+        return statements
+    finally:
+        conn.close()
+
+
+# Plan check. Access types that read a whole table or index
+full_scan_types = ('ALL', 'index')
+
+# Full scans that are intended, as (statement, or the fixed start of a statement
+# built from a template, table scanned, reason). Scans of other tables by these
+# statements, and of these tables by other statements, still fail the check
+full_scan_allowed = [
+    (mysql_utils.favorite_faculty_query, 'favorite_faculty', "returns every favorite, there is no WHERE"),
+    (mysql_utils.favorite_publications_query, 'favorite_publication', "returns every favorite, there is no WHERE"),
+    (mysql_utils.keyword_scores_probe, 'faculty_keyword_score', "LIMIT 1 without WHERE stops at the first row"),
+    (mysql_utils.count_estimate_query.split('{')[0], '<derived2>',
+     "counts the (capped) rows of the inner query, whose own plan rows are checked"),
+]
+
+# EXPLAIN rows of these types describe the target table of an INSERT ... SELECT, not a read
+write_target_types = ('INSERT', 'REPLACE')
+
+write_statement = re.compile(r'\s*(INSERT|REPLACE|UPDATE|DELETE)\b', re.IGNORECASE)
+
+def _scan_allowed(operation, table):
+    return any(operation.startswith(statement) and table == allowed_table
+               for statement, allowed_table, reason in full_scan_allowed)
+
+# Connection handed to mysql_utils during the plan check: statements are
+# recorded, and writes are recorded without being sent to the server
+class _RecordingConnection:
+    def __init__(self, conn, statements):
+        self._conn = conn
+        self._statements = statements
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return _RecordingCursor(self._conn.cursor(*args, **kwargs), self._statements)
+
+    def close(self):
+        self._conn.close()
+
+
+class _RecordingCursor:
+    def __init__(self, cursor, statements):
+        self._cursor = cursor
+        self._statements = statements
+        self._skipped = False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, operation, params=None):
+        self._statements.append((operation, params))
+        self._skipped = bool(write_statement.match(operation))
+        if not self._skipped:
+            return self._cursor.execute(operation, params)
+
+    def fetchall(self):
+        return [] if self._skipped else self._cursor.fetchall()
+
+    def fetchone(self):
+        return None if self._skipped else self._cursor.fetchone()
+
+
+# Sample arguments taken from the data: a faculty member with publications, one
+# of their publications and a word of its title (long enough for the full-text index)
+def _sample_arguments():
+    conn = mysql_utils.get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT fp.faculty_id, p.id, p.title FROM faculty_publication fp
+        JOIN publication p ON p.id = fp.publication_id
+        WHERE p.title IS NOT NULL LIMIT 1
+    """)
+    faculty_id, publication_id, title = cursor.fetchone()
+    conn.close()
+    words = [word for word in re.findall(r'\w+', title) if len(word) >= max(3, mysql_utils.ngram_token_size)]
+    return faculty_id, publication_id, words[0] if words else title
+
+# Calls covering every query of mysql_utils read by the dashboard. The LIKE
+# fallback for terms shorter than ngram_token_size is a full scan by design and
+# is not checked, nor are the full rebuilds of refresh jobs
+def _plan_cases():
+    faculty_id, publication_id, term = _sample_arguments()
+    return [
+        lambda: mysql_utils.search_faculty_page(term),
+        lambda: mysql_utils.search_faculty_page(term, cursor=[1.0, faculty_id], page_size=1),
+        lambda: mysql_utils.search_publication_page(term),
+        lambda: mysql_utils.search_publication_page(term, 2000, 2020),
+        lambda: mysql_utils.get_author_by_publication_id(publication_id),
+        lambda: mysql_utils.get_authors_by_publication_ids([publication_id]),
+        lambda: mysql_utils.get_top_cited_publications(faculty_id),
+        lambda: mysql_utils._research_interest_frequencies_live(faculty_id),
+        lambda: mysql_utils.get_research_interest_frequencies(faculty_id, limit=200),
+        lambda: mysql_utils.get_faculty_name_from_id(faculty_id),
+        lambda: mysql_utils.get_favorite_faculty(),
+        lambda: mysql_utils.get_favorite_publications(),
+        lambda: mysql_utils.save_to_favorites_faculty(faculty_id),
+        lambda: mysql_utils.save_to_favorites_publication(publication_id),
+        lambda: mysql_utils.remove_from_favorites_faculty(faculty_id),
+        lambda: mysql_utils.remove_from_favorites_publication(publication_id),
+        lambda: mysql_utils.refresh_faculty_keyword_scores_for_publications([publication_id]),
+    ]
+
+# Run the plan cases through recording connections (writes are recorded,
+# then skipped), and EXPLAIN each statement. Returns a list of
+# (statement, offending EXPLAIN row) for the full scans found
+def check_plans():
+    statements = []
+    cases = _plan_cases()
+    get_connection = mysql_utils.get_connection
+    # Cached results would skip the queries
+    cache_path, cache_utils.shared_cache_path = cache_utils.shared_cache_path, 'off'
+    mysql_utils.get_connection = lambda: _RecordingConnection(get_connection(), statements)
+    try:
+        for case in cases:
+            case()
+    finally:
+        mysql_utils.get_connection = get_connection
+        cache_utils.shared_cache_path = cache_path
+
+    failures = []
+    seen = set()
+    for operation, params in statements:
+        key = (operation, repr(params))
+        if key in seen or not mysql_utils.explainable_statement.match(operation):
+            continue
+        seen.add(key)
+        for row in mysql_utils.explain_statement(operation, params):
+            if row.get('select_type') in write_target_types:
+                continue
+            if row.get('type') in full_scan_types and not _scan_allowed(operation, row.get('table') or ''):
+                failures.append((operation, row))
+    return failures
+
+if __name__ == '__main__':
+    statements = migrate()
+    for statement in statements:
+        print(statement)
+    print(f"MySQL migrations: {len(statements)} applied")
+    if '--check' in sys.argv[1:]:
+        failures = check_plans()
+        for operation, row in failures:
+            print(f"FULL SCAN ({row.get('type')}) of {row.get('table')}, key {row.get('key')}, rows {row.get('rows')}:")
+            print("    " + " ".join(operation.split()))
+        print(f"Plan check: {len(failures)} full scan(s)")
+        sys.exit(1 if failures else 0)
@@ -1,71 +1,474 @@
+import functools
+import os
+import re
+import threading
+import time
+from collections import deque
+
 import mysql.connector
 
+import cache_utils
+import query_deadline
+import querylog
+
+host='localhost'
+user='root'
 password='mysql_password'
+database='academicworld'
 
-def get_connection():
-    connection = mysql.connector.connect(
-        host='localhost',
-        user='root',
-        password=password,
-        database='academicworld'
-    )
-    return connection
+# Connection pool settings. pool_size connections are kept open, up to
+# pool_max_overflow extra connections are opened under load and closed again
+# when returned, idle connections older than pool_idle_timeout seconds are
+# reaped, and a checkout waits at most pool_timeout seconds for a free slot.
+pool_size = 5
+pool_max_overflow = 10
+pool_idle_timeout = 300
+pool_timeout = 30
+# Idle connections younger than this are handed out without a ping
+pool_recycle_check = 5
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# Wrapper handed out by the pool, close() returns the connection instead of closing it
+class PooledConnection:
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise mysql.connector.errors.OperationalError("Connection already returned to the pool")
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self.__getattr__('cursor')(*args, **kwargs)
+        if query_deadline.remaining_ms() is not None:
+            cursor = TimeLimitedCursor(cursor)
+        if querylog.slow_query_ms is None:
+            return cursor
+        return LoggedCursor(cursor)
 
-# Serach faculty by input
-def search_faculty_by_name(name):
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Statements EXPLAIN accepts
+explainable_statement = re.compile(r'\s*(SELECT|WITH|INSERT|REPLACE|UPDATE|DELETE)\b', re.IGNORECASE)
+
+# EXPLAIN rows of a statement, run on a connection of its own (and never logged itself)
+def explain_statement(operation, params=None):
+    conn = get_connection()
+    try:
+        cursor = conn._raw.cursor(dictionary=True)
+        cursor.execute(f"EXPLAIN {operation}", params)
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+# Cursor wrapper giving each SELECT the time left before the query_deadline as
+# a MAX_EXECUTION_TIME hint, so the server aborts it at the deadline. The hint
+# is scoped to the statement, nothing is left on the pooled connection
+class TimeLimitedCursor:
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        remaining_ms = query_deadline.remaining_ms()
+        if remaining_ms is not None:
+            operation = select_statement.sub(rf'\1 /*+ MAX_EXECUTION_TIME({remaining_ms}) */', operation, count=1)
+        return self._raw.execute(operation, params, *args, **kwargs)
+
+# Statements MAX_EXECUTION_TIME applies to (read-only top-level SELECTs)
+select_statement = re.compile(r'^(\s*SELECT)\b', re.IGNORECASE)
+
+
+# Cursor wrapper timing each statement from execute() until its rows are
+# fetched, statements slower than querylog.slow_query_ms are logged with their EXPLAIN
+class LoggedCursor:
+    def __init__(self, raw):
+        self._raw = raw
+        self._statement = None
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _finish(self):
+        if self._statement is None:
+            return
+        operation, params, start = self._statement
+        self._statement = None
+        seconds = time.perf_counter() - start
+        if querylog.is_slow(seconds):
+            explain = functools.partial(explain_statement, operation, params) if explainable_statement.match(operation) else None
+            querylog.report('mysql', operation, params, seconds, explain)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._finish()
+        self._statement = (operation, params, time.perf_counter())
+        try:
+            result = self._raw.execute(operation, params, *args, **kwargs)
+        except Exception:
+            self._finish()
+            raise
+        # Statements without a result set are done once execute() returns
+        if not self._raw.with_rows:
+            self._finish()
+        return result
+
+    def fetchall(self):
+        rows = self._raw.fetchall()
+        self._finish()
+        return rows
+
+    def fetchone(self):
+        row = self._raw.fetchone()
+        self._finish()
+        return row
+
+    def close(self):
+        self._finish()
+        return self._raw.close()
+
+
+class ConnectionPool:
+    def __init__(self, size, max_overflow, idle_timeout, timeout):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = deque()  # (raw connection, last returned timestamp)
+        self._open = 0
+        self._in_use = 0
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'checkout_time': 0.0,
+            'checkout_time_max': 0.0,
+            'created': 0,
+            'closed': 0,
+            'failed_health_checks': 0,
+            'peak_in_use': 0,
+        }
+
+    def _check_fork(self):
+        # Sockets inherited from the parent process must not be shared, so a
+        # forked child drops the references (without sending COM_QUIT on the
+        # parent's sessions) and starts with an empty pool
+        if self._pid != os.getpid():
+            self._reset()
+
+    def _connect(self):
+        return mysql.connector.connect(
+            host=host,
+            user=user,
+            password=password,
+            database=database
+        )
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        self._stats['closed'] += 1
+
+    def _reap_idle(self, now):
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            raw, _ = self._idle.popleft()
+            self._open -= 1
+            self._discard(raw)
+
+    def acquire(self):
+        self._check_fork()
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                now = time.time()
+                self._reap_idle(now)
+                if self._idle:
+                    raw, returned_at = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._open < self.size + self.max_overflow:
+                    raw, returned_at = None, None
+                    self._open += 1
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"No MySQL connection available within {self.timeout}s "
+                                      f"({self._in_use} in use)")
+                waited = True
+                self._cond.wait(remaining)
+
+        try:
+            # Health-check connections that sat idle for a while, replace dead ones
+            if raw is not None and time.time() - returned_at > pool_recycle_check and not raw.is_connected():
+                self._stats['failed_health_checks'] += 1
+                self._discard(raw)
+                raw = None
+            if raw is None:
+                raw = self._connect()
+                self._stats['created'] += 1
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['checkout_time'] += elapsed
+            self._stats['checkout_time_max'] = max(self._stats['checkout_time_max'], elapsed)
+            self._stats['peak_in_use'] = max(self._stats['peak_in_use'], self._in_use)
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_time'] += elapsed
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        if self._pid != os.getpid():
+            return
+        try:
+            # Drain unread results and end any open transaction so the next
+            # borrower gets a clean session and a fresh snapshot
+            raw.consume_results()
+            raw.rollback()
+            healthy = True
+        except Exception:
+            healthy = False
+        with self._cond:
+            self._in_use -= 1
+            if healthy and self._open <= self.size:
+                self._idle.append((raw, time.time()))
+            else:
+                self._open -= 1
+                self._discard(raw)
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            while self._idle:
+                raw, _ = self._idle.popleft()
+                self._open -= 1
+                self._discard(raw)
+
+    def stats(self):
+        self._check_fork()
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+            })
+        checkouts = stats['checkouts']
+        stats['checkout_time_avg'] = stats['checkout_time'] / checkouts if checkouts else 0.0
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(pool_size, pool_max_overflow, pool_idle_timeout, pool_timeout)
+    return _pool
+
+# Drop the current pool (e.g. after changing the settings above), it is re-created on next use
+def reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool._pid == os.getpid():
+            _pool.close_all()
+        _pool = None
+
+# Pool statistics for sizing: waits, checkout latency, in-use count...
+def pool_stats():
+    return get_pool().stats()
+
+# Borrow a connection from the process-wide pool, close() hands it back
+def get_connection():
+    return get_pool().acquire()
+
+# Full-text search settings: the server's ngram_token_size (shorter terms
+# fall back to a LIKE scan), the number of results per page and the cap of
+# the total-count estimate
+ngram_token_size = 2
+search_limit = 50
+search_count_cap = 1000
+
+# Seconds results are kept in the cross-process cache (cache_utils.shared_cache):
+# search pages, the faculty insight queries, and favorites, which are
+# invalidated by every favorites write
+search_cache_ttl = 300
+faculty_cache_ttl = 600
+favorites_cache_ttl = 3600
+
+# Turn a search term into a boolean-mode phrase, i.e. its ngrams in order
+def _fulltext_phrase(term):
+    return '"' + term.replace('"', ' ') + '"'
+
+def _like_escape(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+# Build the pieces shared by a search page and its count estimate:
+# (relevance expression, WHERE clause, WHERE params, relevance params).
+# Candidates come from the FULLTEXT index, LIKE keeps the exact substring
+# semantics and rows starting with the term get a boost
+def _search_clauses(column, term, extra_relevance=""):
+    contains, prefix = f"%{_like_escape(term)}%", f"{_like_escape(term)}%"
+    if len(term) >= ngram_token_size:
+        phrase = _fulltext_phrase(term)
+        relevance = f"""ROUND(MATCH({column}) AGAINST (%s IN BOOLEAN MODE)
+                    + 10 * ({column} LIKE %s){extra_relevance}, 6)"""
+        where = f"MATCH({column}) AGAINST (%s IN BOOLEAN MODE) AND {column} LIKE %s"
+        return relevance, where, [phrase, contains], [phrase, prefix]
+    # Too short for the ngram index: walk the primary key in order
+    return "0", f"{column} LIKE %s", [contains], []
+
+# Keyset condition for the page after `after` = [relevance, id] of the last row seen,
+# matching the ORDER BY relevance DESC, id of the search queries
+def _keyset_clause(id_column, term, after):
+    if after is None:
+        return "", "", []
+    last_relevance, last_id = after
+    if len(term) >= ngram_token_size:
+        return "", " HAVING relevance < %s OR (relevance = %s AND id > %s)", [last_relevance, last_relevance, last_id]
+    return f" AND {id_column} > %s", "", [last_id]
+
+count_estimate_query = "SELECT COUNT(*) FROM (SELECT 1 {from_where} LIMIT %s) AS matches"
+
+def _count_estimate(from_where, params):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(count_estimate_query.format(from_where=from_where), params + [search_count_cap])
+    count = cursor.fetchone()[0]
+    conn.close()
+    return count
+
+# Search faculty by name, ordered by relevance then id. `after` is the
+# [relevance, id] of the last row of the previous page
+def search_faculty_by_name(name, limit=None, after=None):
+    limit = limit or search_limit
+    term = name.strip()
+    relevance, where, where_params, relevance_params = _search_clauses('faculty.name', term)
+    keyset_where, keyset_having, keyset_params = _keyset_clause('faculty.id', term, after)
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
-    sql_query = """
-        SELECT faculty.id AS id, faculty.name AS name, faculty.position as position, 
-            faculty.research_interest AS research_interest, faculty.email AS email, 
-            faculty.phone AS phone , faculty.photo_url AS photo_url, 
-            university.name AS university
+    sql_query = f"""
+        SELECT faculty.id AS id, faculty.name AS name, faculty.position as position,
+            faculty.research_interest AS research_interest, faculty.email AS email,
+            faculty.phone AS phone , faculty.photo_url AS photo_url,
+            university.name AS university, {relevance} AS relevance
         FROM faculty, university
-        WHERE faculty.university_id = university.id
-            AND faculty.name LIKE %s
+        WHERE faculty.university_id = university.id AND {where}{keyset_where}{keyset_having}
+        ORDER BY relevance DESC, faculty.id
+        LIMIT %s
     """
-    cursor.execute(sql_query, ('%' + name + '%',))
+    cursor.execute(sql_query, relevance_params + where_params + keyset_params + [limit])
     results = cursor.fetchall()
     conn.close()
     return results
 
-# View, Database Techniques R14
-# Create a view of the publication table with set year range
-def search_by_year(year_min, year_max):
+# Search Publication by title, optionally restricted to a year range.
+# The range is passed with each request instead of living in a shared view.
+# Relevance adds the full-text score, a boost for titles starting with the
+# term and log10 of the citation count
+def search_publication_by_title(title, year_min=None, year_max=None, limit=None, after=None):
+    limit = limit or search_limit
+    term = title.strip()
+    relevance, where, where_params, relevance_params = _search_clauses(
+        'title', term, "\n                    + LOG10(1 + COALESCE(num_citations, 0))")
+    if year_min is not None and year_max is not None:
+        where += " AND year BETWEEN %s AND %s"
+        where_params = where_params + [year_min, year_max]
+    keyset_where, keyset_having, keyset_params = _keyset_clause('id', term, after)
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
-
-    # Drop the view if it exists to avoid errors
-    cursor.execute("DROP VIEW IF EXISTS year_publication")
-    
-    # Create the view
-    create_view = f"""
-        CREATE VIEW year_publication AS
-        SELECT *
+    sql_query = f"""
+        SELECT id, title, venue, year, num_citations, {relevance} AS relevance
         FROM publication
-        WHERE publication.year >= %s AND publication.year <= %s
-    """
-    cursor.execute(create_view, (year_min, year_max))
-    
-    # Commit changes and close connection
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-# Search Publication by title
-def search_publication_by_title(title):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    sql_query = """
-        SELECT id, title, venue, year, num_citations
-        FROM year_publication
-        WHERE title LIKE %s
+        WHERE {where}{keyset_where}{keyset_having}
+        ORDER BY relevance DESC, id
+        LIMIT %s
     """
-    cursor.execute(sql_query, (f"%{title}%",))
+    cursor.execute(sql_query, relevance_params + where_params + keyset_params + [limit])
     results = cursor.fetchall()
     conn.close()
     return results
 
+# Turn one more row than the page size into a page:
+# {'rows', 'next_cursor' (None on the last page), 'total', 'total_is_estimate'}
+def _make_page(rows, page_size, total):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = [float(rows[-1]['relevance']), rows[-1]['id']]
+    page = {'rows': rows, 'next_cursor': next_cursor}
+    if total is not None:
+        page['total'] = total
+        page['total_is_estimate'] = total >= search_count_cap
+    return page
+
+# Keyset-paginated faculty search. The total-count estimate (capped at
+# search_count_cap) is only computed for the first page
+@cache_utils.shared_cache(ttl=search_cache_ttl)
+def search_faculty_page(name, cursor=None, page_size=None):
+    page_size = page_size or search_limit
+    rows = search_faculty_by_name(name, limit=page_size + 1, after=cursor)
+    total = None
+    if cursor is None:
+        _, where, where_params, _ = _search_clauses('faculty.name', name.strip())
+        total = _count_estimate(f"FROM faculty, university WHERE faculty.university_id = university.id AND {where}", where_params)
+    return _make_page(rows, page_size, total)
+
+# Keyset-paginated publication search, see search_faculty_page
+@cache_utils.shared_cache(ttl=search_cache_ttl)
+def search_publication_page(title, year_min=None, year_max=None, cursor=None, page_size=None):
+    page_size = page_size or search_limit
+    rows = search_publication_by_title(title, year_min, year_max, limit=page_size + 1, after=cursor)
+    total = None
+    if cursor is None:
+        _, where, where_params, _ = _search_clauses('title', title.strip())
+        if year_min is not None and year_max is not None:
+            where += " AND year BETWEEN %s AND %s"
+            where_params = where_params + [year_min, year_max]
+        total = _count_estimate(f"FROM publication WHERE {where}", where_params)
+    return _make_page(rows, page_size, total)
+
 # Search authors by publication id
 def get_author_by_publication_id(pub_id):
     conn = get_connection()
@@ -79,6 +482,31 @@ def get_author_by_publication_id(pub_id):
     conn.close()
     return results
 
+# Largest IN-list sent in a single query by get_authors_by_publication_ids
+author_batch_size = 1000
+
+# Search authors of many publications at once, returns {publication id: [author names]}
+def get_authors_by_publication_ids(pub_ids):
+    pub_ids = list(dict.fromkeys(pub_ids))
+    authors = {pub_id: [] for pub_id in pub_ids}
+    if not pub_ids:
+        return authors
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    for start in range(0, len(pub_ids), author_batch_size):
+        chunk = pub_ids[start:start + author_batch_size]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        sql_query = f"""
+            SELECT fp.publication_id AS publication_id, f.name AS author
+            FROM faculty f, faculty_publication fp
+            WHERE fp.faculty_id = f.id AND fp.publication_id IN ({placeholders})
+            ORDER BY fp.publication_id, f.name
+        """
+        cursor.execute(sql_query, chunk)
+        for row in cursor.fetchall():
+            authors[row['publication_id']].append(row['author'])
+    conn.close()
+    return authors
 
 # Save to favorite faculty
 def save_to_favorites_faculty(item_id):
@@ -118,6 +546,7 @@ def save_to_favorites_faculty(item_id):
     
     conn.commit()
     conn.close()
+    get_favorite_faculty.invalidate()
 
 # Save to favorite publication
 def save_to_favorites_publication(item_id):
@@ -152,8 +581,19 @@ def save_to_favorites_publication(item_id):
     
     conn.commit()
     conn.close()
+    get_favorite_publications.invalidate()
+
+favorite_faculty_query = """
+    SELECT favorite_faculty.id AS id, favorite_faculty.name AS name, favorite_faculty.position as position, 
+        favorite_faculty.research_interest AS research_interest, favorite_faculty.email AS email, 
+        favorite_faculty.phone AS phone, favorite_faculty.photo_url AS photo_url, 
+        university.name AS university
+    FROM favorite_faculty, university
+    WHERE favorite_faculty.university_id = university.id
+"""
 
 # Get list of favorite faculty
+@cache_utils.shared_cache(ttl=favorites_cache_ttl)
 def get_favorite_faculty():
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
@@ -172,21 +612,18 @@ def get_favorite_faculty():
         );
     """)
 
-    sql_query = """
-        SELECT favorite_faculty.id AS id, favorite_faculty.name AS name, favorite_faculty.position as position, 
-            favorite_faculty.research_interest AS research_interest, favorite_faculty.email AS email, 
-            favorite_faculty.phone AS phone, favorite_faculty.photo_url AS photo_url, 
-            university.name AS university
-        FROM favorite_faculty, university
-        WHERE favorite_faculty.university_id = university.id
-    """
-
-    cursor.execute(sql_query)
+    cursor.execute(favorite_faculty_query)
     results = cursor.fetchall()
     conn.close()
     return results
 
+favorite_publications_query = """
+    SELECT id, title, venue, year, num_citations
+    FROM favorite_publication
+"""
+
 # Get list of favorite publication
+@cache_utils.shared_cache(ttl=favorites_cache_ttl)
 def get_favorite_publications():
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
@@ -202,12 +639,7 @@ def get_favorite_publications():
         );
     """)
 
-    sql_query = """
-        SELECT id, title, venue, year, num_citations
-        FROM favorite_publication
-    """
-
-    cursor.execute(sql_query)
+    cursor.execute(favorite_publications_query)
     results = cursor.fetchall()
     conn.close()
     return results
@@ -225,6 +657,7 @@ def remove_from_favorites_faculty(faculty_id):
     cursor.execute(sql_query, (faculty_id,))
     conn.commit()
     conn.close()
+    get_favorite_faculty.invalidate()
 
 # remove from favorite publication
 def remove_from_favorites_publication(publication_id):
@@ -239,8 +672,10 @@ def remove_from_favorites_publication(publication_id):
     cursor.execute(sql_query, (publication_id,))
     conn.commit()
     conn.close()
+    get_favorite_publications.invalidate()
 
 
+@cache_utils.shared_cache(ttl=faculty_cache_ttl)
 def get_top_cited_publications(faculty_id, limit=5):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
@@ -258,8 +693,118 @@ def get_top_cited_publications(faculty_id, limit=5):
     conn.close()
     return results
 
-# Get all the keywords and their frequencies (sum of their publication scores) of all of a faculty's publications
-def get_research_interest_frequencies(faculty_id):
+# Materialized keyword scores: one row per (faculty, keyword) with the sum of
+# the keyword's scores over the faculty's publications and the number of those
+# publications. Built by refresh_faculty_keyword_scores() (python refresh.py
+# faculty_keyword_scores) and read by primary key range on faculty_id
+faculty_keyword_score_schema = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        faculty_id INT NOT NULL,
+        keyword_id INT NOT NULL,
+        score_sum DOUBLE NOT NULL,
+        pub_count INT NOT NULL,
+        PRIMARY KEY (faculty_id, keyword_id)
+    )
+"""
+
+faculty_keyword_score_select = """
+    SELECT fp.faculty_id, pk.keyword_id, SUM(pk.score), COUNT(*)
+    FROM faculty_publication fp
+    JOIN publication p ON p.id = fp.publication_id
+    JOIN publication_keyword pk ON pk.publication_id = p.id
+    {where}
+    GROUP BY fp.faculty_id, pk.keyword_id
+"""
+
+keyword_score_batch_size = 500
+
+# Rebuild faculty_keyword_score, entirely or only the rows of the given faculty ids.
+# A full rebuild fills a new table and swaps it in atomically, so readers
+# never see it half built
+def refresh_faculty_keyword_scores(faculty_ids=None):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(faculty_keyword_score_schema.format(table='faculty_keyword_score'))
+    if faculty_ids is None:
+        cursor.execute("DROP TABLE IF EXISTS faculty_keyword_score_new, faculty_keyword_score_old")
+        cursor.execute(faculty_keyword_score_schema.format(table='faculty_keyword_score_new'))
+        cursor.execute("INSERT INTO faculty_keyword_score_new " + faculty_keyword_score_select.format(where=""))
+        conn.commit()
+        cursor.execute("RENAME TABLE faculty_keyword_score TO faculty_keyword_score_old, "
+                       "faculty_keyword_score_new TO faculty_keyword_score")
+        cursor.execute("DROP TABLE faculty_keyword_score_old")
+    else:
+        faculty_ids = list(faculty_ids)
+        for start in range(0, len(faculty_ids), keyword_score_batch_size):
+            batch = faculty_ids[start:start + keyword_score_batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"DELETE FROM faculty_keyword_score WHERE faculty_id IN ({placeholders})", batch)
+            cursor.execute("INSERT INTO faculty_keyword_score " + faculty_keyword_score_select.format(
+                where=f"WHERE fp.faculty_id IN ({placeholders})"), batch)
+            conn.commit()
+    conn.close()
+    get_research_interest_frequencies.invalidate()
+
+# Incremental refresh after publications (or their keywords/authors) changed.
+# The affected faculty are found through faculty_publication, so call it before
+# deleting publications, not after. Changes are also recorded by triggers and
+# picked up by refresh_changed_faculty_keyword_scores()
+def refresh_faculty_keyword_scores_for_publications(publication_ids):
+    publication_ids = list(publication_ids)
+    if not publication_ids:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    placeholders = ', '.join(['%s'] * len(publication_ids))
+    cursor.execute(f"SELECT DISTINCT faculty_id FROM faculty_publication WHERE publication_id IN ({placeholders})", publication_ids)
+    faculty_ids = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    refresh_faculty_keyword_scores(faculty_ids)
+
+# Faculty whose keyword scores are out of date, recorded by the triggers of
+# mysql_migrations on every change of faculty_publication and publication_keyword,
+# and before a publication or faculty member is deleted (while their
+# faculty_publication rows still exist)
+faculty_keyword_score_changes_schema = """
+    CREATE TABLE IF NOT EXISTS faculty_keyword_score_changes (
+        id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        faculty_id INT NOT NULL
+    )
+"""
+
+# Refresh the faculty recorded in faculty_keyword_score_changes, up to the
+# newest change seen when the job starts (the watermark). Only the change rows
+# read are deleted afterwards, so a change committed meanwhile is left for the
+# next run. Before the first full build the whole table is built instead.
+# Returns the number of faculty refreshed (None for a full build)
+def refresh_changed_faculty_keyword_scores():
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(id) FROM faculty_keyword_score_changes")
+    watermark = cursor.fetchone()[0]
+    cursor.execute("SELECT id, faculty_id FROM faculty_keyword_score_changes WHERE id <= %s", (watermark or 0,))
+    changes = cursor.fetchall()
+    built = _keyword_scores_built(cursor)
+    conn.close()
+    if not built:
+        refresh_faculty_keyword_scores()
+        refreshed = None
+    else:
+        refresh_faculty_keyword_scores(sorted({faculty_id for _, faculty_id in changes}))
+        refreshed = len({faculty_id for _, faculty_id in changes})
+    change_ids = [change_id for change_id, _ in changes]
+    conn = get_connection()
+    cursor = conn.cursor()
+    for start in range(0, len(change_ids), keyword_score_batch_size):
+        batch = change_ids[start:start + keyword_score_batch_size]
+        cursor.execute(f"DELETE FROM faculty_keyword_score_changes WHERE id IN ({', '.join(['%s'] * len(batch))})", batch)
+        conn.commit()
+    conn.close()
+    return refreshed
+
+# Keyword frequencies computed from the base tables, used until
+# refresh_faculty_keyword_scores() has built faculty_keyword_score
+def _research_interest_frequencies_live(faculty_id):
     conn = get_connection()
     cursor = conn.cursor()
     sql_query = """SELECT k.name as keyword, SUM(pk.score) as count
@@ -275,6 +820,49 @@ def get_research_interest_frequencies(faculty_id):
     conn.close()
     return results
 
+# Whether faculty_keyword_score has rows. Reads at most one row, checked once per process
+keyword_scores_probe = "SELECT 1 FROM faculty_keyword_score LIMIT 1"
+
+def _keyword_scores_built(cursor):
+    try:
+        cursor.execute(keyword_scores_probe)
+    except mysql.connector.errors.ProgrammingError:
+        return False
+    return cursor.fetchone() is not None
+
+_keyword_scores_materialized = False
+
+# Get all the keywords and their frequencies (sum of their publication scores)
+# of all of a faculty's publications, as (keyword, frequency) in ascending
+# frequency. With a limit, only the `limit` most frequent keywords
+@cache_utils.shared_cache(ttl=faculty_cache_ttl)
+def get_research_interest_frequencies(faculty_id, limit=None):
+    global _keyword_scores_materialized
+    conn = get_connection()
+    cursor = conn.cursor()
+    if not _keyword_scores_materialized:
+        if not _keyword_scores_built(cursor):
+            conn.close()
+            results = _research_interest_frequencies_live(faculty_id)
+            return results[-limit:] if limit else results
+        _keyword_scores_materialized = True
+    sql_query = """
+        SELECT k.name AS keyword, s.score_sum AS count
+        FROM faculty_keyword_score s
+        JOIN keyword k ON k.id = s.keyword_id
+        WHERE s.faculty_id = %s
+        ORDER BY s.score_sum DESC
+    """
+    params = [faculty_id]
+    if limit:
+        sql_query += " LIMIT %s"
+        params.append(limit)
+    cursor.execute(sql_query, params)
+    results = cursor.fetchall()
+    conn.close()
+    results.reverse()
+    return results
+
 # Get Faculty name from ID to use for Neo4j Search
 def get_faculty_name_from_id(id):
     conn = get_connection()
@@ -1,32 +1,132 @@
-from neo4j import GraphDatabase
+import atexit
+import functools
+import os
+import re
+import threading
+import time
+
+import cache_utils
+import query_deadline
+import querylog
 
 uri = "bolt://localhost:7687"
 username = "neo4j"
 password = "your_neo4j_password"
 database = "academicworld"
 
+_driver = None
+_driver_pid = None
+_driver_lock = threading.Lock()
+
+# One driver per process, created on first use so importing this module does
+# not import the driver package nor touch the network. A forked child creates
+# its own instead of reusing the parent's
+def get_driver():
+    global _driver, _driver_pid
+    if _driver is None or _driver_pid != os.getpid():
+        with _driver_lock:
+            if _driver is None or _driver_pid != os.getpid():
+                from neo4j import GraphDatabase
+                _driver = GraphDatabase.driver(uri, auth=(username, password))
+                _driver_pid = os.getpid()
+    return _driver
+
+# Close the driver of this process (its connection pool)
+def close_driver():
+    global _driver, _driver_pid
+    with _driver_lock:
+        if _driver is not None and _driver_pid == os.getpid():
+            _driver.close()
+        _driver = None
+        _driver_pid = None
+
+atexit.register(close_driver)
+
+# Queries that change the graph. Their slow-query plan is taken with EXPLAIN,
+# read queries are PROFILEd (which runs them again to count rows and db hits)
+write_clauses = re.compile(r'\b(CREATE|MERGE|DELETE|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV)\b', re.IGNORECASE)
+
+def _query_plan(query, params):
+    mode = "EXPLAIN" if write_clauses.search(query) else "PROFILE"
+    with get_driver().session(database=database) as session:
+        summary = session.run(f"{mode} {query}", **params).consume()
+    return summary.plan if mode == "EXPLAIN" else summary.profile
+
+# Run a query in a session or transaction and fetch all its records. Queries
+# slower than querylog.slow_query_ms are logged with their plan. Within a
+# query_deadline, a query run in a session gets the time left as its
+# transaction timeout (explicit transactions set their own)
+def _run(session, query, **params):
+    from neo4j import Query, Session
+    start = time.perf_counter()
+    remaining_ms = query_deadline.remaining_ms()
+    if remaining_ms is not None and isinstance(session, Session):
+        records = list(session.run(Query(query, timeout=remaining_ms / 1000), **params))
+    else:
+        records = list(session.run(query, **params))
+    seconds = time.perf_counter() - start
+    if querylog.is_slow(seconds):
+        querylog.report('neo4j', query, params, seconds, functools.partial(_query_plan, query, params))
+    return records
 
-driver = GraphDatabase.driver(uri, auth=(username, password))
+# Indexing: uniqueness constraints on the ids used to look up nodes, created at startup.
+# If a constraint cannot be created (e.g. duplicate ids) a plain index is created instead
+neo4j_indexes = [
+    ("CREATE CONSTRAINT faculty_id_unique IF NOT EXISTS FOR (f:FACULTY) REQUIRE f.id IS UNIQUE",
+     "CREATE INDEX faculty_id IF NOT EXISTS FOR (f:FACULTY) ON (f.id)"),
+    ("CREATE CONSTRAINT publication_id_unique IF NOT EXISTS FOR (p:PUBLICATION) REQUIRE p.id IS UNIQUE",
+     "CREATE INDEX publication_id IF NOT EXISTS FOR (p:PUBLICATION) ON (p.id)"),
+    ("CREATE INDEX institute_name IF NOT EXISTS FOR (i:INSTITUTE) ON (i.name)", None),
+]
+
+def create_indexes():
+    with get_driver().session(database=database) as session:
+        for statement, fallback in neo4j_indexes:
+            try:
+                _run(session, statement)
+            except Exception:
+                if fallback is None:
+                    raise
+                _run(session, fallback)
 
 # count institue
 def count_institute():
-    with driver.session(database=database) as session:
-        result = session.run("MATCH (i:INSTITUTE) RETURN count(i) AS institute_count")
-        return result.single()['institute_count']
+    with get_driver().session(database=database) as session:
+        records = _run(session, "MATCH (i:INSTITUTE) RETURN count(i) AS institute_count")
+        return records[0]['institute_count']
+
+
+# Faculty counts change only when data is loaded, so they are cached in-process
+faculty_count_cache_ttl = 600
 
+# Faculty count of every INSTITUTE and the total faculty count in one grouped query:
+# {"total_faculty_count": n, "universities": {institute name: faculty count}}
+institute_faculty_counts_query = """
+MATCH (f:FACULTY)
+WITH count(f) AS total_faculty_count
+MATCH (i:INSTITUTE)
+OPTIONAL MATCH (f:FACULTY)-[:AFFILIATION_WITH]->(i)
+RETURN total_faculty_count, i.name AS university, count(f) AS university_faculty_count
+"""
+
+total_faculty_count_query = "MATCH (f:FACULTY) RETURN count(f) AS total_faculty_count"
+
+@cache_utils.ttl_cache(ttl=faculty_count_cache_ttl)
+def get_institute_faculty_counts():
+    with get_driver().session(database=database) as session:
+        records = _run(session, institute_faculty_counts_query)
+        if records:
+            total_faculty_count = records[0]["total_faculty_count"]
+        else:
+            total_faculty_count = _run(session, total_faculty_count_query)[0]["total_faculty_count"]
+    universities = {}
+    for record in records:
+        universities[record["university"]] = universities.get(record["university"], 0) + record["university_faculty_count"]
+    return {"total_faculty_count": total_faculty_count, "universities": universities}
 
 def get_university_counts(university_name):
-    with driver.session(database=database) as session:
-        total_faculty_result = session.run("MATCH (f:FACULTY) RETURN count(f) AS total_faculty_count")
-        total_faculty_count = total_faculty_result.single()['total_faculty_count']
-
-        university_faculty_result = session.run(f"""
-            MATCH (f:FACULTY)-[:AFFILIATION_WITH]->(i:INSTITUTE {{name: '{university_name}'}})
-            RETURN count(f) AS university_faculty_count
-        """)
-        university_faculty_count = university_faculty_result.single()['university_faculty_count']
-        
-        return total_faculty_count, university_faculty_count
+    counts = get_institute_faculty_counts()
+    return counts["total_faculty_count"], counts["universities"].get(university_name, 0)
 
 # To generate total faculty count in the database, faculty count in a school, the ratio (school faculty count/all faculty count)   
 def get_university_faculty_ratio(university_name):
@@ -34,37 +134,125 @@ def get_university_faculty_ratio(university_name):
     ratio = university_faculty_count / total_faculty_count if total_faculty_count != 0 else 0
     return total_faculty_count, university_faculty_count, ratio
 
-# find the relationship between faculties    
-def get_collaborations_for_faculty(faculty_name):
-    query = f"""
-    MATCH (f1:FACULTY {{name: '{faculty_name}'}})-[pub1:PUBLISH]->(p:PUBLICATION)<-[pub2:PUBLISH]-(f2:FACULTY)
-    WHERE f1.id <> f2.id
-    RETURN f1.name AS faculty1, f2.name AS faculty2, COUNT(p) AS collaborations
-    """
-    with driver.session(database=database) as session:
-        result = session.run(query)
-        collaborations = [{"source": record["faculty1"], "target": record["faculty2"], "weight": record["collaborations"]} for record in result]
-    return collaborations
-
-# Generate nodes to populate graphs
-def get_faculty_nodes_for_faculty(faculty_name):
-    query = f"""
-    MATCH (f:FACULTY)-[pub1:PUBLISH]->(p:PUBLICATION)<-[pub2:PUBLISH]-(co:FACULTY)
-    WHERE f.name = '{faculty_name}' AND f.id <> co.id
-    RETURN f.name AS faculty1, f.photoUrl AS photo1, co.name AS faculty2, co.photoUrl AS photo2
-    """
-    with driver.session(database=database) as session:
-        result = session.run(query)
-        faculty_nodes = set()
+# All universities ranked by faculty count, from the cached counts
+def get_faculty_leaderboard(limit=None):
+    counts = get_institute_faculty_counts()
+    total_faculty_count = counts["total_faculty_count"]
+    ranked = sorted(counts["universities"].items(), key=lambda item: (-item[1], item[0]))
+    if limit:
+        ranked = ranked[:limit]
+    return [{
+        "rank": rank,
+        "university": university,
+        "university_faculty_count": university_faculty_count,
+        "ratio": university_faculty_count / total_faculty_count if total_faculty_count != 0 else 0
+    } for rank, (university, university_faculty_count) in enumerate(ranked, start=1)]
+
+# Materialized collaborations: one COLLABORATES_WITH {count, first_year, last_year}
+# relationship per pair of faculty with shared publications, so rendering
+# a network does not expand FACULTY -> PUBLICATION -> FACULTY at query time
+collaboration_batch_size = 500
+
+delete_collaborations_query = """
+UNWIND $faculty_ids AS faculty_id
+MATCH (f:FACULTY {id: faculty_id})-[r:COLLABORATES_WITH]-()
+DELETE r
+"""
+
+# Recreate the edges of the given faculty. MERGE without a direction finds an
+# edge already created from the co-author's side, so each pair has one edge
+merge_collaborations_query = """
+UNWIND $faculty_ids AS faculty_id
+MATCH (f:FACULTY {id: faculty_id})-[:PUBLISH]->(p:PUBLICATION)<-[:PUBLISH]-(co:FACULTY)
+WHERE f.id <> co.id
+WITH f, co, count(p) AS shared, min(p.year) AS first_year, max(p.year) AS last_year
+MERGE (f)-[r:COLLABORATES_WITH]-(co)
+SET r.count = shared, r.first_year = first_year, r.last_year = last_year
+"""
+
+# Marks the edges as built by a full refresh. Until then networks are read
+# from the PUBLISH edges (an incremental refresh alone leaves most pairs out)
+mark_collaborations_built_query = """
+MERGE (m:MATERIALIZED {name: 'COLLABORATES_WITH'})
+SET m.built_at = timestamp()
+"""
+
+collaborations_built_query = """
+MATCH (m:MATERIALIZED {name: 'COLLABORATES_WITH'})
+RETURN count(m) > 0 AS built
+"""
+
+def _batches(items):
+    for start in range(0, len(items), collaboration_batch_size):
+        yield items[start:start + collaboration_batch_size]
+
+# Rebuild COLLABORATES_WITH edges, of the whole graph or only of the given faculty ids.
+# Each batch replaces the edges of its faculty in one transaction, so readers
+# never see a faculty member without their edges
+def refresh_collaborations(faculty_ids=None):
+    with get_driver().session(database=database) as session:
+        full = faculty_ids is None
+        if full:
+            faculty_ids = [record["id"] for record in _run(session, "MATCH (f:FACULTY) RETURN f.id AS id")]
+        for batch in _batches(list(faculty_ids)):
+            with session.begin_transaction() as tx:
+                _run(tx, delete_collaborations_query, faculty_ids=batch)
+                _run(tx, merge_collaborations_query, faculty_ids=batch)
+                tx.commit()
+        if full:
+            _run(session, mark_collaborations_built_query)
+    get_collaboration_network.invalidate()
+
+# Add PUBLISH edges from faculty to a publication and update their collaborations.
+# Every new pair involves one of the new authors, so refreshing them is enough
+def add_publication_authors(publication_id, faculty_ids):
+    faculty_ids = list(faculty_ids)
+    with get_driver().session(database=database) as session:
+        _run(session, """
+            UNWIND $faculty_ids AS faculty_id
+            MATCH (f:FACULTY {id: faculty_id}), (p:PUBLICATION {id: $publication_id})
+            MERGE (f)-[:PUBLISH]->(p)
+        """, faculty_ids=faculty_ids, publication_id=publication_id)
+    refresh_collaborations(faculty_ids)
+
+# Collaboration network of a faculty member in one lookup: the faculty and
+# co-author nodes (keyed by faculty id) and edges weighted by shared publications
+collaboration_network_query = """
+MATCH (f:FACULTY {id: $faculty_id})-[r:COLLABORATES_WITH]-(co:FACULTY)
+RETURN f.id AS id1, f.name AS faculty1, f.photoUrl AS photo1,
+    co.id AS id2, co.name AS faculty2, co.photoUrl AS photo2, r.count AS collaborations
+"""
+
+# The same network computed from the PUBLISH edges, used until
+# refresh_collaborations() has built the COLLABORATES_WITH edges
+live_collaboration_network_query = """
+MATCH (f:FACULTY {id: $faculty_id})-[:PUBLISH]->(p:PUBLICATION)<-[:PUBLISH]-(co:FACULTY)
+WHERE f.id <> co.id
+RETURN f.id AS id1, f.name AS faculty1, f.photoUrl AS photo1,
+    co.id AS id2, co.name AS faculty2, co.photoUrl AS photo2, count(p) AS collaborations
+"""
+
+_collaborations_materialized = False
+
+# Networks are cached across processes (cache_utils.shared_cache), refresh_collaborations invalidates them
+collaboration_cache_ttl = 3600
+
+@cache_utils.shared_cache(ttl=collaboration_cache_ttl)
+def get_collaboration_network(faculty_id):
+    global _collaborations_materialized
+    with get_driver().session(database=database) as session:
+        if not _collaborations_materialized:
+            _collaborations_materialized = _run(session, collaborations_built_query)[0]["built"]
+        query = collaboration_network_query if _collaborations_materialized else live_collaboration_network_query
+        result = _run(session, query, faculty_id=faculty_id)
+        nodes = {}
+        edges = []
         for record in result:
-            faculty1 = record["faculty1"]
-            photo1 = record["photo1"]
-            faculty2 = record["faculty2"]
-            photo2 = record["photo2"]
-            faculty_nodes.add((faculty1, photo1))
-            faculty_nodes.add((faculty2, photo2))
-        faculty_nodes = [{"id": node[0], "label": node[0], "image":node[1]} for node in faculty_nodes]
-    return faculty_nodes
+            source, target = str(record["id1"]), str(record["id2"])
+            nodes[source] = {"id": source, "label": record["faculty1"], "image": record["photo1"]}
+            nodes[target] = {"id": target, "label": record["faculty2"], "image": record["photo2"]}
+            edges.append({"source": source, "target": target, "weight": record["collaborations"]})
+    return list(nodes.values()), edges
 
 if __name__ == "__main__":
     try:
@@ -74,5 +262,5 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
-        driver.close()
+        close_driver()
 
@@ -0,0 +1,27 @@
+import contextlib
+import threading
+import time
+
+# Per-thread deadline for database queries. Inside limit(seconds), mysql_utils,
+# mongodb_utils and neo4j_utils pass the time left to the server (MySQL
+# MAX_EXECUTION_TIME, MongoDB maxTimeMS, Neo4j transaction timeout), so a query
+# the caller has stopped waiting for is also stopped on the server
+_local = threading.local()
+
+@contextlib.contextmanager
+def limit(seconds):
+    previous = getattr(_local, 'deadline', None)
+    deadline = time.monotonic() + seconds
+    _local.deadline = deadline if previous is None else min(previous, deadline)
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+# Milliseconds left before the deadline of this thread (at least 1, since 0
+# means no limit to the servers), or None outside limit()
+def remaining_ms():
+    deadline = getattr(_local, 'deadline', None)
+    if deadline is None:
+        return None
+    return max(1, int((deadline - time.monotonic()) * 1000))
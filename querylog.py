@@ -0,0 +1,104 @@
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Slow-query log shared by mysql_utils, mongodb_utils and neo4j_utils. Queries
+# taking at least slow_query_ms are written as one JSON object per line to a
+# rotating log, with their parameters, duration, the *_utils function that
+# issued them and their execution plan. Plans are captured on a background
+# thread, so the slow request does not also wait for the EXPLAIN.
+#
+# The log is off unless a threshold is set: every slow query costs the database
+# a second round trip for its plan (PROFILE re-runs Neo4j read queries), and
+# MySQL statements are timed through a cursor wrapper.
+#
+#   DASHBOARD_SLOW_QUERY_MS   threshold in milliseconds (default "off", e.g. 500)
+#   DASHBOARD_SLOW_QUERY_LOG  log file (default logs/slow_queries.log next to this module)
+_threshold = os.environ.get('DASHBOARD_SLOW_QUERY_MS', 'off')
+slow_query_ms = None if _threshold.strip().lower() in ('', 'off') else float(_threshold)
+log_path = os.environ.get('DASHBOARD_SLOW_QUERY_LOG',
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'slow_queries.log'))
+log_max_bytes = 10 * 1024 * 1024
+log_backup_count = 5
+# Longer queries/parameters (e.g. large id batches) are cut to this many characters
+max_field_length = 10000
+
+_logger = logging.getLogger('dashboard.slow_queries')
+_logger.propagate = False
+_logger_lock = threading.Lock()
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def is_slow(seconds):
+    return slow_query_ms is not None and seconds * 1000 >= slow_query_ms
+
+def _get_logger():
+    with _logger_lock:
+        if not _logger.handlers:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=log_max_bytes, backupCount=log_backup_count)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            _logger.addHandler(handler)
+            _logger.setLevel(logging.INFO)
+    return _logger
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query-plan')
+            _executor_pid = os.getpid()
+        return _executor
+
+# Nearest public function of a *_utils module on the stack, e.g. "mysql_utils.search_faculty_by_name"
+def _caller():
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        name = frame.f_code.co_name
+        if module.endswith('_utils') and not name.startswith('_') and name in frame.f_globals:
+            return f"{module}.{name}"
+        frame = frame.f_back
+    return None
+
+def _clip(value):
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    if len(text) <= max_field_length:
+        return value
+    return text[:max_field_length] + '...'
+
+def _write(record, explain):
+    if explain is not None:
+        try:
+            record['plan'] = explain()
+        except Exception as e:
+            record['plan_error'] = f"{type(e).__name__}: {e}"
+    _get_logger().info(json.dumps(record, default=str))
+
+# Log a query that took `seconds`. explain() returns its plan and is called
+# on the background thread; pass None for statements that have no plan.
+def report(backend, query, params, seconds, explain=None):
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'backend': backend,
+        'caller': _caller(),
+        'duration_ms': round(seconds * 1000, 3),
+        'query': _clip(query),
+        'params': _clip(params),
+        'pid': os.getpid(),
+    }
+    _get_executor().submit(_write, record, explain)
+
+# Wait for the pending plan captures and log writes (tests, shutdown)
+def flush():
+    _get_executor().submit(lambda: None).result()
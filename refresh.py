@@ -0,0 +1,47 @@
+# Batch jobs that (re)build the precomputed tables/collections read by the dashboard.
+#
+#   python refresh.py            # run every job
+#   python refresh.py krc        # run selected jobs
+#   python refresh.py --incremental  # run every incremental job (e.g. from cron)
+import sys
+import time
+
+import mongodb_utils
+import mysql_migrations
+import mysql_utils
+import neo4j_utils
+
+# Job name -> (function doing a full rebuild, index setup or migrations it relies on)
+jobs = {
+    'krc': (mongodb_utils.refresh_krc, mongodb_utils.create_indexes),
+    'keyword_rollups': (mongodb_utils.refresh_keyword_rollups, mongodb_utils.create_indexes),
+    'collaborations': (neo4j_utils.refresh_collaborations, neo4j_utils.create_indexes),
+    'faculty_keyword_scores': (mysql_utils.refresh_faculty_keyword_scores, mysql_migrations.migrate),
+}
+
+# Job name -> (function refreshing only what changed since its last run, setup).
+# Each falls back to a full rebuild when nothing has been built yet
+incremental_jobs = {
+    'mongodb_changes': (mongodb_utils.refresh_changed, mongodb_utils.enable_pre_images),
+    'faculty_keyword_score_changes': (mysql_utils.refresh_changed_faculty_keyword_scores, mysql_migrations.migrate),
+}
+
+def run(names):
+    prepared = set()
+    for name in names:
+        refresh, create_indexes = jobs.get(name) or incremental_jobs[name]
+        if create_indexes not in prepared:
+            create_indexes()
+            prepared.add(create_indexes)
+        start = time.perf_counter()
+        refresh()
+        print(f"{name}: refreshed in {time.perf_counter() - start:.1f}s")
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(jobs)
+    if names == ['--incremental']:
+        names = list(incremental_jobs)
+    unknown = [name for name in names if name not in jobs and name not in incremental_jobs]
+    if unknown:
+        sys.exit(f"Unknown job(s): {', '.join(unknown)}. Available: {', '.join([*jobs, *incremental_jobs])}")
+    run(names)
@@ -0,0 +1,102 @@
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import mysql_utils
+import neo4j_utils
+import query_deadline
+
+logger = logging.getLogger(__name__)
+
+# Service layer shared by the Dash callbacks and the REST API routes, so a
+# callback never has to call the app's own HTTP endpoints
+
+# Faculty counts and ratio of a university, as served by /api/get_university_faculty_ratio
+def university_faculty_ratio(university_name):
+    total_faculty_count, university_faculty_count, ratio = neo4j_utils.get_university_faculty_ratio(university_name)
+    return {
+        "total_faculty_count": total_faculty_count,
+        "university_faculty_count": university_faculty_count,
+        "ratio": ratio
+    }
+
+# All universities ranked by faculty count, as served by /api/get_university_leaderboard
+def university_leaderboard(limit=None):
+    return neo4j_utils.get_faculty_leaderboard(limit)
+
+# The faculty insight queries are independent, so they run concurrently on a
+# shared thread pool and the panel waits at most insight_deadline seconds overall.
+# The time left is passed to the servers (query_deadline), which abort queries
+# still running at the deadline: cancelling a running future does not stop them
+insight_workers = 16
+insight_deadline = 10
+# Keywords fetched for the word cloud, which draws at most 200 words (WordCloud's max_words)
+insight_keyword_limit = 200
+
+_insight_executor = None
+_insight_executor_pid = None
+_insight_lock = threading.Lock()
+
+def _get_insight_executor():
+    global _insight_executor, _insight_executor_pid
+    with _insight_lock:
+        if _insight_executor is None or _insight_executor_pid != os.getpid():
+            _insight_executor = ThreadPoolExecutor(max_workers=insight_workers, thread_name_prefix='insight')
+            _insight_executor_pid = os.getpid()
+        return _insight_executor
+
+# Data of the faculty insight panel. Returns a dict with the result of each
+# query (None if it failed or missed the deadline) plus
+#   "timings":   seconds per finished query
+#   "errors":    error message per failed query
+#   "timed_out": queries still running at the deadline
+#   "elapsed":   seconds for the whole fan-out
+def faculty_insight(faculty_id, deadline=None):
+    deadline = insight_deadline if deadline is None else deadline
+    queries = {
+        "top_cited_publications": mysql_utils.get_top_cited_publications,
+        "keyword_frequencies": functools.partial(mysql_utils.get_research_interest_frequencies, limit=insight_keyword_limit),
+        "collaboration_network": neo4j_utils.get_collaboration_network,
+    }
+    executor = _get_insight_executor()
+    start = time.perf_counter()
+    submitted = {}
+    timings = {}
+
+    def run(name, fn):
+        query_start = time.perf_counter()
+        try:
+            with query_deadline.limit(deadline - (query_start - start)):
+                return fn(faculty_id)
+        finally:
+            timings[name] = time.perf_counter() - query_start
+
+    for name, fn in queries.items():
+        submitted[name] = executor.submit(run, name, fn)
+    wait(submitted.values(), timeout=deadline)
+
+    insight = {"timings": {}, "errors": {}, "timed_out": []}
+    for name, future in submitted.items():
+        insight[name] = None
+        if not future.done():
+            future.cancel()
+            insight["timed_out"].append(name)
+        elif future.exception() is not None:
+            insight["errors"][name] = str(future.exception())
+            insight["timings"][name] = timings.get(name)
+        else:
+            insight[name] = future.result()
+            insight["timings"][name] = timings.get(name)
+    insight["elapsed"] = time.perf_counter() - start
+
+    logger.info("faculty insight %s in %.1f ms (%s)%s", faculty_id, insight["elapsed"] * 1000,
+                ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in insight["timings"].items()),
+                f", timed out: {', '.join(insight['timed_out'])}" if insight["timed_out"] else "")
+    for name in insight["timed_out"]:
+        logger.warning("faculty insight %s: %s timed out after %.1f s", faculty_id, name, deadline)
+    for name, error in insight["errors"].items():
+        logger.warning("faculty insight %s: %s failed: %s", faculty_id, name, error)
+    return insight
@@ -0,0 +1,56 @@
+# Import-time budget of app.py: imports the app with python -X importtime in
+# fresh interpreters and fails if the best import takes longer than the budget
+# or if a module that should be imported lazily was loaded.
+#
+#   python -m unittest tests.test_import_time
+#   DASHBOARD_IMPORT_BUDGET=1.0 python -m pytest tests/test_import_time.py
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Seconds, cumulative import time of app as reported by -X importtime
+import_budget = float(os.environ.get('DASHBOARD_IMPORT_BUDGET', '1.5'))
+runs = 3
+# Only needed once a word cloud is rendered or Neo4j is queried
+lazy_modules = ['matplotlib', 'wordcloud', 'neo4j']
+
+
+# Modules imported by "import app" with their cumulative import time in seconds
+def import_times():
+    env = dict(os.environ)
+    env.pop('DASHBOARD_METRICS', None)
+    # The warm-up threads would import the lazy modules while we look
+    env['DASHBOARD_WARMUP'] = 'off'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative) / 1e6
+    return modules
+
+
+class ImportTimeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.runs = [import_times() for _ in range(runs)]
+
+    def test_import_within_budget(self):
+        best = min(modules['app'] for modules in self.runs)
+        self.assertLessEqual(best, import_budget,
+                             f"import app took {best:.3f}s, over the {import_budget:.3f}s budget")
+
+    def test_lazy_modules_not_imported(self):
+        loaded = sorted({name for modules in self.runs for name in modules
+                         if name.split('.')[0] in lazy_modules})
+        self.assertEqual(loaded, [], f"imported at startup instead of lazily: {', '.join(loaded)}")
+
+
+if __name__ == '__main__':
+    unittest.main()
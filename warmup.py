@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+import time
+
+import mongodb_utils
+import mysql_migrations
+import neo4j_utils
+
+logger = logging.getLogger(__name__)
+
+# Startup work that needs the databases. It runs on background threads, one
+# per task, so the app starts and serves /healthz even when a backend is slow
+# or down; a failed task is retried with exponential backoff until it succeeds.
+# /readyz reports ready once every task is done. DASHBOARD_WARMUP=off skips it
+# (e.g. when the indexes are managed separately). The MySQL task only checks
+# that mysql_migrations has been run: rebuilding tables from every worker at
+# once on each deploy is left to python mysql_migrations.py.
+enabled = os.environ.get('DASHBOARD_WARMUP', 'on').strip().lower() not in ('0', 'off', 'false')
+tasks = [
+    ('mongodb_indexes', lambda: mongodb_utils.create_indexes()),
+    ('mysql_migrations', lambda: mysql_migrations.check()),
+    ('neo4j_indexes', lambda: neo4j_utils.create_indexes()),
+    # Load the affiliation list used by the summary and the university dropdown
+    ('affiliation_cache', lambda: mongodb_utils.warm_affiliation_cache()),
+]
+retry_initial_delay = 1
+retry_max_delay = 60
+
+_state = {}  # task name -> {"status", "attempts", "error", "seconds"}
+_state_lock = threading.Lock()
+_started_pid = None
+
+
+def _update(name, **fields):
+    with _state_lock:
+        _state[name].update(fields)
+
+def _run_task(name, fn):
+    delay = retry_initial_delay
+    attempts = 0
+    while True:
+        attempts += 1
+        _update(name, status='running', attempts=attempts)
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            _update(name, status='retrying', error=f"{type(e).__name__}: {e}")
+            logger.warning("warm-up %s failed (attempt %d), retrying in %ss: %s", name, attempts, delay, e)
+            time.sleep(delay)
+            delay = min(delay * 2, retry_max_delay)
+            continue
+        _update(name, status='done', error=None, seconds=round(time.perf_counter() - start, 3))
+        logger.info("warm-up %s done in %.1fs", name, time.perf_counter() - start)
+        return
+
+# Start the warm-up in this process, once. A forked worker (whose copy of the
+# parent's threads is gone) starts again, skipping the tasks the parent finished
+def start():
+    global _started_pid
+    if not enabled or _started_pid == os.getpid():
+        return
+    with _state_lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+        pending = []
+        for name, fn in tasks:
+            if _state.get(name, {}).get('status') == 'done':
+                continue
+            _state[name] = {'status': 'pending', 'attempts': 0, 'error': None, 'seconds': None}
+            pending.append((name, fn))
+    for name, fn in pending:
+        threading.Thread(target=_run_task, args=(name, fn), name=f'warmup-{name}', daemon=True).start()
+
+def ready():
+    if not enabled:
+        return True
+    with _state_lock:
+        return _started_pid is not None and all(task['status'] == 'done' for task in _state.values())
+
+# Copy of the state of every task, for /readyz
+def status():
+    with _state_lock:
+        return {name: dict(task) for name, task in _state.items()}
@@ -0,0 +1,139 @@
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+# Default image size of the research topic word cloud
+width = 850
+height = 380
+
+# Rendered images are kept in an in-memory LRU and on disk, keyed by
+# (faculty id, hash of the frequencies, size), so a faculty rendered a moment
+# ago (or by another worker process) is not laid out again
+memory_cache_size = 128
+disk_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'wordcloud')
+
+# Layout and rasterization run in a process pool so concurrent requests
+# are not serialized behind the GIL. Render processes are spawned, not forked:
+# forking a threaded server worker can deadlock the child on a lock held by
+# another thread
+render_workers = 2
+render_timeout = 60
+
+_memory_cache = OrderedDict()
+_in_flight = {}
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+
+
+# Runs in a worker process, returns the PNG bytes
+def _render_png(frequencies, width, height):
+    from wordcloud import WordCloud
+    wordcloud = WordCloud(width=width, height=height, background_color='white').generate_from_frequencies(frequencies)
+    image = BytesIO()
+    wordcloud.to_image().save(image, format='PNG')
+    return image.getvalue()
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=render_workers, mp_context=multiprocessing.get_context('spawn'))
+            _executor_pid = os.getpid()
+        return _executor
+
+# Forget a pool whose render process died, the next render starts a new one
+def _discard_executor(executor):
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is executor:
+            _executor = None
+            _executor_pid = None
+    executor.shutdown(wait=False)
+
+# Stop the render processes of this process' pool, a new pool is started on next use
+def shutdown_renderer():
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        _executor_pid = None
+
+def _cache_key(faculty_id, frequencies, width, height):
+    payload = json.dumps(sorted(frequencies.items()), separators=(',', ':'))
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    return f"{faculty_id}-{digest}-{width}x{height}"
+
+def _to_data_uri(png):
+    return 'data:image/png;base64,' + base64.b64encode(png).decode('utf-8')
+
+def _remember(key, image):
+    with _lock:
+        _memory_cache[key] = image
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > memory_cache_size:
+            _memory_cache.popitem(last=False)
+
+def _read_disk(key):
+    try:
+        with open(os.path.join(disk_cache_dir, key + '.png'), 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _write_disk(key, png):
+    try:
+        os.makedirs(disk_cache_dir, exist_ok=True)
+        path = os.path.join(disk_cache_dir, key + '.png')
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+# Word cloud of {keyword: score} as a PNG data URI, from the memory cache,
+# the disk cache, or rendered in the process pool. Concurrent requests for
+# the same image share one render. Raises TimeoutError after render_timeout
+# seconds and BrokenProcessPool if the render process died
+def get_wordcloud(faculty_id, frequencies, width=width, height=height):
+    frequencies = {str(word): float(score) for word, score in frequencies.items()}
+    key = _cache_key(faculty_id, frequencies, width, height)
+    with _lock:
+        image = _memory_cache.get(key)
+        if image is not None:
+            _memory_cache.move_to_end(key)
+            return image
+
+    png = _read_disk(key)
+    if png is None:
+        executor = _get_executor()
+        with _lock:
+            future = _in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = executor.submit(_render_png, frequencies, width, height)
+                _in_flight[key] = future
+        try:
+            png = future.result(timeout=render_timeout)
+            if owner:
+                _write_disk(key, png)
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            raise
+        finally:
+            if owner:
+                with _lock:
+                    _in_flight.pop(key, None)
+
+    image = _to_data_uri(png)
+    _remember(key, image)
+    return image
@@ -0,0 +1,24 @@
+# Production entry point: the Flask server of the dashboard as a WSGI app for
+# multi-process servers, e.g. with the settings in gunicorn.conf.py
+#
+#   gunicorn -c gunicorn.conf.py
+#   gunicorn wsgi:application --workers 4 --threads 8 --preload
+import mongodb_utils
+import mysql_utils
+import neo4j_utils
+import warmup
+import wordcloud_utils
+from app import server
+
+application = server
+
+# Database clients, thread and process pools are per process. With preload the
+# app is imported once in the master and forked into the workers, so each
+# worker drops whatever it inherited and opens its own on first use, then
+# starts its warm-up.
+def after_fork():
+    mysql_utils.reset_pool()
+    mongodb_utils.close_client()
+    neo4j_utils.close_driver()
+    wordcloud_utils.shutdown_renderer()
+    warmup.start()